@@ -0,0 +1,1824 @@
+# -------------------------------- BENCHMARKS -------------------------------- #
+
+# Runs performance benchmarks for MEALY DISPLAYINATOR 3000 against a local
+# stand-in for TheMealDB, so no live API traffic is needed.
+#
+# python benchmark.py [transport] [cache] [images] [scheduler] [grid] [options] [suggestions] [catalog] [lookups] [recipes] [records] [render] [decode] [e2e] [instruments] [startup] [compound] [names] [pages] [singleflight] [lists] [popup] [updates] [traffic]
+# python benchmark.py serve [port] [latencyMs] [jitterMs] [errorRate]
+#
+# UI benchmarks need a display, without one they run on Xvfb when it is installed
+# and are reported as skipped otherwise
+
+# -------------------------------- IMPORTS -------------------------------- #
+
+import os
+import sys
+import json
+import tempfile
+import contextlib
+import time
+import random
+import heapq
+import hashlib
+import threading
+import statistics
+import tracemalloc
+import multiprocessing
+import subprocess
+import shutil
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import tkinter
+import requests
+
+import pythonApplication as app
+
+# -------------------------------- STAND-IN SERVER -------------------------------- #
+
+# Small JPEG served for every image url, noisy makes it decode like a real photo
+def makeJpeg(size = (700, 700), noisy = False) :
+    from io import BytesIO
+    from PIL import Image
+
+    image = Image.new('RGB', size, 'orange')
+    if noisy : image = Image.merge('RGB', [Image.effect_noise(size, 40 + 20 * band) for band in range(3)])
+
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality = 85)
+    return buffer.getvalue()
+
+class StandInHandler(BaseHTTPRequestHandler) :
+    # Keep-alive needs HTTP/1.1 and a Content-Length on every response
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes, avoid Nagle delays on kept-alive sockets
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) : pass
+
+    # Runs once per new connection, models the TCP+TLS handshake cost
+    def setup(self) :
+        super().setup()
+        self.server.stats['connections'] += 1
+        time.sleep(self.server.handshakeDelay)
+
+    def send(self, status, body, contentType, headers = {}) :
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items() : self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) :
+        server = self.server
+        server.stats['requests'] += 1
+
+        with server.lock :
+            server.active += 1
+            server.stats['peakActive'] = max(server.stats.get('peakActive', 0), server.active)
+            # Past capacity every request slows down in proportion, like an overloaded upstream
+            load = max(1.0, server.active / server.capacity) if server.capacity else 1.0
+
+        try :
+            # Every response waits the base latency plus up to jitter more
+            time.sleep((server.latency + random.uniform(0, server.jitter)) * load)
+
+            if random.random() < server.errorRate :
+                server.stats['errors'] = server.stats.get('errors', 0) + 1
+                return self.send(503, b'{}', 'application/json')
+
+            self.respondTo()
+        finally :
+            with server.lock : server.active -= 1
+
+    def respondTo(self) :
+        parts = urlsplit(self.path)
+        query = {key : value[0] for key, value in parse_qs(parts.query).items()}
+
+        if parts.path.startswith('/images/') :
+            return self.send(200, self.server.jpeg, 'image/jpeg')
+
+        route = parts.path.rsplit('/', 1)[-1].removesuffix('.php')
+        meals = self.server.respond(route, query)
+        body = json.dumps({'meals' : meals}).encode()
+
+        # Lists carry an ETag and answer a matching If-None-Match with an empty 304
+        if route == 'list' :
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+
+            if self.headers.get('If-None-Match') == etag :
+                self.server.stats['notModified'] = self.server.stats.get('notModified', 0) + 1
+                return self.send(304, b'', 'application/json', {'ETag' : etag})
+
+            return self.send(200, body, 'application/json', {'ETag' : etag})
+
+        self.send(200, body, 'application/json')
+
+# Fixture option lists, combined into a few hundred ingredient names like the real list
+categories = ['Beef', 'Breakfast', 'Chicken', 'Dessert', 'Goat', 'Lamb', 'Miscellaneous', 'Pasta', 'Pork', 'Seafood', 'Side', 'Starter', 'Vegan', 'Vegetarian']
+areas = ['American', 'British', 'Canadian', 'Chinese', 'Croatian', 'Dutch', 'Egyptian', 'French', 'Greek', 'Indian', 'Irish', 'Italian', 'Jamaican', 'Japanese', 'Kenyan', 'Malaysian', 'Mexican', 'Moroccan', 'Polish', 'Portuguese', 'Russian', 'Spanish', 'Thai', 'Tunisian', 'Turkish', 'Vietnamese']
+ingredientBases = ['Chicken', 'Beef', 'Pork', 'Lamb', 'Salmon', 'Garlic', 'Onion', 'Pepper', 'Tomato', 'Potato', 'Rice', 'Flour', 'Sugar', 'Butter', 'Cheese', 'Milk', 'Egg', 'Ginger', 'Chilli', 'Lemon', 'Lime', 'Mushroom', 'Carrot', 'Bean']
+ingredientKinds = ['', 'Red ', 'Green ', 'Black ', 'White ', 'Smoked ', 'Dried ', 'Fresh ', 'Ground ', 'Sweet ', 'Chopped ', 'Minced ', 'Frozen ', 'Baby ', 'Wild ', 'Spring ', 'Roasted ', 'Sliced ', 'Grated ', 'Canned ', 'Whole ', 'Plain ', 'Large ', 'Small ', 'Organic ']
+ingredients = [f'{kind}{base}' for base in ingredientBases for kind in ingredientKinds]
+dishes = ['Curry', 'Pie', 'Stew', 'Soup', 'Salad', 'Roast', 'Tagine', 'Risotto', 'Burger', 'Skewers']
+mealNames = [f'{base} {dish}' for dish in dishes for base in ingredientBases]
+
+# Larger listen backlog so bursts of new connections are not dropped
+class StandInHTTPServer(ThreadingHTTPServer) :
+    request_queue_size = 128
+
+# resultCount fixes how many meals every filter returns, None filters the fixture catalog for real
+# errorRate is the share of requests answered with a 503, capacity the requests served before everything slows down
+# Both can be changed on httpd while the server runs, port 0 picks a free port
+class StandInServer :
+    def __init__(self, latency = 0.005, handshakeDelay = 0.03, resultCount = 25, jitter = 0.0, port = 0, errorRate = 0.0, capacity = None) :
+        self.httpd = StandInHTTPServer(('127.0.0.1', port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.errorRate = errorRate
+        self.httpd.capacity = capacity
+        self.httpd.active = 0
+        self.httpd.lock = threading.Lock()
+        self.httpd.handshakeDelay = handshakeDelay
+        self.httpd.stats = {'connections' : 0, 'requests' : 0}
+        self.httpd.jpeg = makeJpeg()
+        self.httpd.respond = self.respond
+
+        self.resultCount = resultCount
+        self.root = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.url = f'{self.root}/api/json/v1/1'
+
+    @property
+    def stats(self) :
+        return self.httpd.stats
+
+    # Filter routes only return id, name and thumbnail, lookups return everything
+    def meal(self, index, full = False) :
+        meal = {
+            'idMeal' : str(52700 + index),
+            'strMeal' : mealNames[index % len(mealNames)],
+            'strMealThumb' : f'{self.root}/images/media/meals/{index}.jpg'
+        }
+
+        if not full : return meal
+
+        chosen = [ingredientBases[(index + step * 5) % len(ingredientBases)] for step in range(6)]
+        meal |= {
+            'strCategory' : categories[index % len(categories)],
+            'strArea' : areas[index % len(areas)],
+            'strInstructions' : f'Cook the {meal['strMeal'].lower()} slowly.\r\nServe hot.',
+            'strYoutube' : f'https://www.youtube.com/watch?v=standin{index}'
+        }
+
+        # Same 20 ingredient / measure slots as the API, unused ones empty
+        for slot in range(1, 21) :
+            meal[f'strIngredient{slot}'] = chosen[slot - 1] if slot <= len(chosen) else ''
+            meal[f'strMeasure{slot}'] = f'{slot * 50}g' if slot <= len(chosen) else ''
+
+        return meal
+
+    def matches(self, index, query) :
+        meal = self.meal(index, full = True)
+        if 'c' in query : return meal['strCategory'].lower() == query['c'].lower()
+        if 'a' in query : return meal['strArea'].lower() == query['a'].lower()
+        text = query.get('i', '').replace('_', ' ').lower()
+        return any(meal[f'strIngredient{slot}'].lower() == text for slot in range(1, 21))
+
+    def respond(self, route, query) :
+        if route == 'lookup' :
+            # Like TheMealDB, an ID that is not a number finds nothing
+            if not query.get('i', '').isdigit() : return None
+            index = int(query['i']) - 52700
+            return [self.meal(index, full = True)] if 0 <= index < len(mealNames) else None
+
+        if route == 'list' :
+            if 'c' in query : return [{'strCategory' : name} for name in categories]
+            if 'a' in query : return [{'strArea' : name} for name in areas]
+            return [{'idIngredient' : str(index), 'strIngredient' : name} for index, name in enumerate(ingredients)]
+
+        # Name search matches anywhere in the name, like TheMealDB
+        if route == 'search' :
+            text = query.get('s', '').lower()
+            return [self.meal(index) for index in range(len(mealNames)) if text in mealNames[index].lower()] or None
+
+        if self.resultCount is not None : return [self.meal(index) for index in range(self.resultCount)]
+        return [self.meal(index) for index in range(len(mealNames)) if self.matches(index, query)] or None
+
+    def start(self) :
+        threading.Thread(target = self.httpd.serve_forever, daemon = True).start()
+        return self
+
+    def stop(self) :
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# -------------------------------- HELPERS -------------------------------- #
+
+# Runs every function in its own thread and waits, like the thread-per-card UI
+def runThreads(functions) :
+    threads = [threading.Thread(target = function) for function in functions]
+    for thread in threads : thread.start()
+    for thread in threads : thread.join()
+
+# MealAPI pointed at the stand-in server, with caches in a throwaway folder
+def makeApi(server, cache = None, images = None, catalog = None, names = None, lists = None, source = 'remote') :
+    folder = tempfile.mkdtemp()
+
+    return app.MealAPI(
+        server.url,
+        cache = cache or app.ResponseCache(os.path.join(folder, 'responses.sqlite3')),
+        images = images or app.ImageCache(os.path.join(folder, 'images')),
+        catalog = catalog or app.MealCatalog(os.path.join(folder, 'catalog.sqlite3')),
+        names = names or app.NameIndex(os.path.join(folder, 'names.sqlite3')),
+        lists = lists or app.OptionLists(os.path.join(folder, 'lists.sqlite3')),
+        source = source
+    )
+
+# HeadlessLoop running on its own thread like the Tk main loop, stop() ends it
+def backgroundLoop() :
+    loop = HeadlessLoop()
+    stopped = threading.Event()
+    threading.Thread(target = loop.run, args = (stopped.is_set,), daemon = True).start()
+    return loop, stopped.set
+
+# Nearest rank percentile of sorted samples
+def percentile(ordered, fraction) :
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def summarize(samples) :
+    ordered = sorted(samples)
+    return {
+        'mean_ms' : round(statistics.mean(ordered) * 1000, 3),
+        'p50_ms' : round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms' : round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms' : round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms' : round(ordered[-1] * 1000, 3)
+    }
+
+# -------------------------------- TRANSPORT -------------------------------- #
+
+# Results page: one category search then 25 thumbnails, bare requests.get vs pooled transport
+def benchTransport(runs = 10) :
+    server = StandInServer().start()
+    # Zero byte cache so every run measures the network path
+    api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+
+    def bareRequests() :
+        meals = requests.get(f'{server.url}/filter.php?c=Beef').json()['meals']
+        runThreads([lambda meal = meal : requests.get(f'{meal['strMealThumb']}/preview').content for meal in meals])
+
+    def pooledTransport() :
+        meals = api.processMeals(api.searchMeals('category', 'Beef'))
+        runThreads([lambda meal = meal : api.fetchImage(meal.previewThumb) for meal in meals])
+
+    results = {}
+
+    for name, function in [('bare', bareRequests), ('pooled', pooledTransport)] :
+        server.stats.update(connections = 0, requests = 0)
+        samples = []
+
+        for _ in range(runs) :
+            start = time.perf_counter()
+            function()
+            samples.append(time.perf_counter() - start)
+
+        results[name] = summarize(samples) | {'connections' : server.stats['connections'], 'requests' : server.stats['requests']}
+
+    server.stop()
+    results['speedup'] = round(results['bare']['mean_ms'] / results['pooled']['mean_ms'], 2)
+    return results
+
+# -------------------------------- RESPONSE CACHE -------------------------------- #
+
+# Repeat searches served from the SQLite cache after a simulated restart
+def benchResponseCache(runs = 200) :
+    server = StandInServer().start()
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, 'responses.sqlite3')
+    prompts = [('category', 'Beef'), ('name', 'chicken'), ('id', '52701'), ('area', 'Italian')]
+
+    # First run fills the cache from the network
+    api = makeApi(server, cache = app.ResponseCache(path))
+    start = time.perf_counter()
+    for mode, prompt in prompts : api.searchMeals(mode, prompt)
+    cold = (time.perf_counter() - start) / len(prompts)
+    api.cache.db.close()
+
+    # Restart with a fresh MealAPI over the same file
+    requestsBefore = server.stats['requests']
+    api = makeApi(server, cache = app.ResponseCache(path))
+    samples = []
+
+    for _ in range(runs) :
+        for mode, prompt in prompts :
+            start = time.perf_counter()
+            api.searchMeals(mode, f' {prompt.upper()} ')
+            samples.append(time.perf_counter() - start)
+
+    server.stop()
+    return {
+        'cold_ms' : round(cold * 1000, 2),
+        'warm' : summarize(samples),
+        'networkRequestsWhenWarm' : server.stats['requests'] - requestsBefore,
+        'cache' : api.cache.info()
+    }
+
+# -------------------------------- IMAGE CACHE -------------------------------- #
+
+# Renders every thumbnail of a results page cold, warm in memory, and after a restart from disk
+def benchImageCache() :
+    server = StandInServer().start()
+    folder = tempfile.mkdtemp()
+    api = makeApi(server, images = app.ImageCache(folder))
+    meals = api.processMeals(api.searchMeals('category', 'Beef'))
+
+    def renderThumbnails() :
+        before = server.stats['requests']
+        start = time.perf_counter()
+        runThreads([lambda meal = meal : api.loadImage(meal.previewThumb, app.imageSmall) for meal in meals])
+        return {'ms' : round((time.perf_counter() - start) * 1000, 2), 'networkRequests' : server.stats['requests'] - before}
+
+    results = {'cold' : renderThumbnails(), 'warmMemory' : renderThumbnails()}
+
+    # Restart : empty memory tier, same disk tier
+    api.images = app.ImageCache(folder)
+    results['warmDisk'] = renderThumbnails()
+    results['cache'] = api.images.info()
+
+    server.stop()
+    return results
+
+# -------------------------------- FETCH SCHEDULER -------------------------------- #
+
+# Samples the process thread count in the background
+class ThreadMonitor :
+    def __init__(self) :
+        self.peak = threading.active_count()
+        self.running = True
+        self.thread = threading.Thread(target = self.sample, daemon = True)
+        self.thread.start()
+
+    def sample(self) :
+        while self.running :
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(0.001)
+
+    def stop(self) :
+        self.running = False
+        self.thread.join()
+        return self.peak
+
+# 100 card thumbnails for a broad search : thread-per-card vs scheduler, first 8 cards are on screen
+def benchScheduler(resultCount = 100, visibleCards = 8) :
+    server = StandInServer(resultCount = resultCount).start()
+    meals = makeApi(server).processMeals(makeApi(server).searchMeals('category', 'Beef'))
+    results = {}
+
+    def measure(name, loadAll) :
+        api = makeApi(server)
+        visibleDone = []
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        def delivered(index) :
+            with lock :
+                if index < visibleCards : visibleDone.append(time.perf_counter() - start)
+
+        monitor = ThreadMonitor()
+        loadAll(api, delivered)
+        total = time.perf_counter() - start
+
+        results[name] = {
+            'totalMs' : round(total * 1000, 2),
+            'imagesPerSecond' : round(len(meals) / total, 2),
+            'peakThreads' : monitor.stop(),
+            'firstVisibleMs' : round(min(visibleDone) * 1000, 2),
+            'allVisibleMs' : round(max(visibleDone) * 1000, 2)
+        }
+
+    def threadPerCard(api, delivered) :
+        runThreads([
+            lambda index = index, meal = meal : (api.loadImage(meal.previewThumb, app.imageSmall), delivered(index))
+            for index, meal in enumerate(meals)
+        ])
+
+    def scheduled(api, delivered) :
+        finished = threading.Semaphore(0)
+
+        for index, meal in enumerate(meals) :
+            api.scheduler.submit(
+                lambda meal = meal : api.loadImage(meal.previewThumb, app.imageSmall),
+                lambda image, index = index : (delivered(index), finished.release()),
+                priority = index // 4 # Row of a 4 column grid
+            )
+
+        for _ in meals : finished.acquire()
+
+    measure('threadPerCard', threadPerCard)
+    measure('scheduler', scheduled)
+
+    # A new search right after submitting drops the old queue
+    api = makeApi(server)
+    for meal in meals : api.scheduler.submit(lambda meal = meal : api.loadImage(meal.previewThumb, app.imageSmall), lambda image : None)
+    api.scheduler.newGeneration()
+    time.sleep(0.5)
+    results['cancellation'] = api.scheduler.info()
+
+    server.stop()
+    return results
+
+# -------------------------------- VIRTUAL GRID -------------------------------- #
+
+def countWidgets(widget) :
+    return 1 + sum(countWidgets(child) for child in widget.winfo_children())
+
+# Build, scroll and clear latency plus widget count, one card per result vs the virtualized pool
+# Needs a display, the full grid is skipped above fullLimit results since it takes minutes
+def benchVirtualGrid(sizes = (50, 500, 5000), scrolls = 40, fullLimit = 500) :
+    server = StandInServer().start()
+    api = makeApi(server)
+
+    root = app.ctk.CTk()
+    root.geometry('1400x900')
+    placeHolder = app.ctk.CTkImage(app.Image.new('RGB', app.imageSmall, 'gray'), size = app.imageSmall)
+    updates = app.UpdateQueue(root)
+    updates.start()
+    factory = lambda parent, meal : app.CardUI(parent, meal, placeHolder, api, updates)
+    results = {}
+
+    for mode in ['full', 'virtual'] :
+        for size in sizes :
+            if mode == 'full' and size > fullLimit : continue
+
+            meals = api.processMeals([server.meal(index) for index in range(size)])
+            grid = app.MainUI(root, 4, 0, virtualThreshold = 0 if mode == 'virtual' else size + 1)
+            grid.pack(fill = 'both', expand = True)
+            root.update()
+
+            start = time.perf_counter()
+
+            if mode == 'virtual' :
+                grid.setRecords(meals, factory)
+            else :
+                for meal in meals : grid.addCard(factory(grid, meal))
+
+            root.update()
+            build = time.perf_counter() - start
+            widgets = countWidgets(root)
+
+            samples = []
+
+            for step in range(scrolls) :
+                start = time.perf_counter()
+                grid._parent_canvas.yview_moveto(step / scrolls)
+                root.update()
+                samples.append(time.perf_counter() - start)
+
+            # The last rows must be reachable without any window passing the X11 size limit
+            grid._parent_canvas.yview_moveto(1)
+            root.update()
+            reachedEnd = max(grid.bound) == size - 1 if mode == 'virtual' else True
+            frameHeight = grid.winfo_height()
+
+            start = time.perf_counter()
+            grid.clear()
+            root.update()
+            clear = time.perf_counter() - start
+
+            results[f'{mode}{size}'] = {
+                'buildMs' : round(build * 1000, 2),
+                'widgets' : widgets,
+                'scroll' : summarize(samples),
+                'clearMs' : round(clear * 1000, 2),
+                'reachedEnd' : reachedEnd,
+                'frameHeight' : frameHeight
+            }
+
+            grid.destroy()
+            api.scheduler.newGeneration()
+
+    root.destroy()
+    server.stop()
+    return results
+
+# -------------------------------- OPTION INDEX -------------------------------- #
+
+# Autocomplete for list modes : listOptions plus a linear scan per keystroke vs the local index
+def benchOptionIndex(runs = 200) :
+    server = StandInServer().start()
+    api = makeApi(server)
+    queries = ['ch', 'chi', 'pep', 'red', 'oni', 'gr', 'ground b', 'pot', 'mush', 'zz']
+    results = {}
+
+    def linearScan(mode, text) :
+        return [item for item in api.listOptions(mode) if text in item.lower()][:4]
+
+    for mode in ['ingredient', 'category', 'area'] :
+        api.suggestOptions(mode, 'warm') # Build once, network excluded from both sides
+        before = server.stats['requests']
+
+        for name, function in [('linear', linearScan), ('index', api.suggestOptions)] :
+            samples = []
+
+            for _ in range(runs) :
+                for text in queries :
+                    start = time.perf_counter()
+                    function(mode, text)
+                    samples.append(time.perf_counter() - start)
+
+            results[f'{mode}.{name}'] = summarize(samples)
+
+        results[f'{mode}.networkRequests'] = server.stats['requests'] - before
+
+    server.stop()
+    return results
+
+# -------------------------------- SUGGESTION PIPELINE -------------------------------- #
+
+# Name autocomplete while typing at 60 ms per key with a pause after each word
+# A thread per keystroke vs the debounced pipeline
+def benchSuggestions(words = ('chi', 'chicken curry', 'bee', 'beef stew', 'salmon', 'garlic'), keyDelay = 0.06, pause = 0.3) :
+    server = StandInServer(latency = 0.08).start()
+    api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+    results = {}
+
+    def fetch(text, mode, limit = 4) :
+        return api.processMeals(api.searchMeals(mode, text))[:limit]
+
+    def typeWords(onKey) :
+        keystrokes = 0
+        for word in words :
+            for length in range(2, len(word) + 1) :
+                onKey(word[:length])
+                keystrokes += 1
+                time.sleep(keyDelay)
+            time.sleep(pause)
+        time.sleep(0.5) # Let the last requests land
+        return keystrokes
+
+    # Old behaviour
+    before = server.stats['requests']
+    keystrokes = typeWords(lambda text : threading.Thread(target = lambda : fetch(text, 'name'), daemon = True).start())
+    results['threadPerKeystroke'] = {'keystrokes' : keystrokes, 'requests' : server.stats['requests'] - before}
+    results['threadPerKeystroke']['requestsPerKeystroke'] = round(results['threadPerKeystroke']['requests'] / keystrokes, 3)
+
+    # Pipeline, keystrokes arrive on the loop thread like <KeyRelease> on the Tk main thread
+    before = server.stats['requests']
+    loop, stop = backgroundLoop()
+    pipeline = app.SuggestionPipeline(loop, fetch, lambda text, mode, suggestions : None)
+    threadsBefore = threading.active_count()
+    peakThreads = [0]
+
+    def keystroke(text) :
+        pipeline.keystroke(text, 'name')
+        peakThreads[0] = max(peakThreads[0], threading.active_count() - threadsBefore)
+
+    typeWords(lambda text : loop.after(0, keystroke, text))
+    stop()
+    results['pipeline'] = pipeline.info() | {'serverRequests' : server.stats['requests'] - before, 'extraThreadsWhileTyping' : peakThreads[0]}
+
+    server.stop()
+    return results
+
+# -------------------------------- OFFLINE CATALOG -------------------------------- #
+
+# Harvest, incremental re-sync, then every search mode answered locally vs remotely
+def benchCatalog(runs = 50) :
+    server = StandInServer(resultCount = None).start()
+    path = os.path.join(tempfile.mkdtemp(), 'catalog.sqlite3')
+    api = makeApi(server, catalog = app.MealCatalog(path))
+    results = {}
+
+    start = time.perf_counter()
+    results['harvest'] = api.harvest() | {'ms' : round((time.perf_counter() - start) * 1000, 2)}
+
+    before = server.stats['requests']
+    results['resync'] = api.harvest() | {'requests' : server.stats['requests'] - before}
+
+    prompts = [('id', '52710'), ('name', 'curry'), ('category', 'Seafood'), ('ingredient', 'garlic'), ('area', 'Italian')]
+
+    for source in ['remote', 'local'] :
+        # Zero byte response cache so remote really goes to the server
+        sourceApi = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0), catalog = app.MealCatalog(path), source = source)
+        before = server.stats['requests']
+        samples = []
+
+        for _ in range(runs) :
+            for mode, prompt in prompts :
+                start = time.perf_counter()
+                sourceApi.searchMeals(mode, prompt)
+                samples.append(time.perf_counter() - start)
+
+        results[source] = summarize(samples) | {'networkRequests' : server.stats['requests'] - before}
+
+    results['sameAnswers'] = all(
+        {meal['idMeal'] for meal in makeApi(server, source = 'remote').searchMeals(mode, prompt)} == {meal['idMeal'] for meal in sourceApi.searchMeals(mode, prompt)}
+        for mode, prompt in prompts
+    )
+
+    server.stop()
+    return results
+
+# -------------------------------- BATCH LOOKUP -------------------------------- #
+
+# Full recipes for 100 IDs (plus duplicates) : one lookup at a time vs lookupMany
+def benchLookupMany(count = 100, concurrency = 8) :
+    server = StandInServer(latency = 0.03).start()
+    ids = [str(52700 + index) for index in range(count)]
+    results = {}
+
+    # Zero byte response cache so both sides go to the server
+    api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+
+    before = server.stats['requests']
+    start = time.perf_counter()
+    sequential = [meal for mealId in ids for meal in api.processMeals(api.searchMeals('id', mealId))]
+    results['sequential'] = {'ms' : round((time.perf_counter() - start) * 1000, 2), 'meals' : len(sequential), 'requests' : server.stats['requests'] - before}
+
+    before = server.stats['requests']
+    start = time.perf_counter()
+    firstMeal = None
+    batched = []
+
+    for meal in api.lookupMany(ids + ids[:20], concurrency) :
+        if firstMeal is None : firstMeal = time.perf_counter() - start
+        batched.append(meal)
+
+    results['batched'] = {
+        'ms' : round((time.perf_counter() - start) * 1000, 2),
+        'firstMealMs' : round(firstMeal * 1000, 2),
+        'meals' : len(batched),
+        'requests' : server.stats['requests'] - before,
+        'concurrency' : concurrency
+    }
+
+    results['speedup'] = round(results['sequential']['ms'] / results['batched']['ms'], 2)
+    server.stop()
+    return results
+
+# -------------------------------- RECIPE DETAILS -------------------------------- #
+
+# Main thread time blocked per card click and time until details are ready
+# Old : lookup inside the click handler, cold : loaded off-thread, warm : prefetched on hover
+# Popup widget construction needs a display and is left out of all three
+def benchRecipeOpen(clicks = 20) :
+    server = StandInServer(latency = 0.08).start()
+    results = {}
+
+    def fresh() :
+        return makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+
+    api = fresh()
+    blocked = []
+
+    for index in range(clicks) :
+        start = time.perf_counter()
+        api.processMeals(api.searchMeals('id', str(52700 + index)))
+        blocked.append(time.perf_counter() - start)
+
+    results['old'] = {'blocked' : summarize(blocked), 'ready' : summarize(blocked)}
+
+    api = fresh()
+    blocked, ready = [], []
+
+    for index in range(clicks) :
+        mealId = str(52700 + index)
+        start = time.perf_counter()
+        api.details.get(mealId)
+        blocked.append(time.perf_counter() - start)
+
+        finished = threading.Event()
+        threading.Thread(target = lambda : (api.details.load(mealId), finished.set())).start()
+        finished.wait()
+        ready.append(time.perf_counter() - start)
+
+    results['cold'] = {'blocked' : summarize(blocked), 'ready' : summarize(ready)}
+
+    api = fresh()
+    for index in range(clicks) : api.prefetchDetails(str(52700 + index))
+    time.sleep(1.0) # The user hovering before clicking
+
+    blocked = []
+
+    for index in range(clicks) :
+        start = time.perf_counter()
+        api.details.get(str(52700 + index))
+        blocked.append(time.perf_counter() - start)
+
+    results['warm'] = {'blocked' : summarize(blocked), 'ready' : summarize(blocked), 'details' : api.details.info()}
+
+    server.stop()
+    return results
+
+# -------------------------------- MEAL RECORDS -------------------------------- #
+
+# processMeals before Meal records, one dict per meal with every field built up front
+def legacyProcessMeals(meals) :
+    processed = []
+
+    for meal in meals :
+        cleanMeal = {
+            'idMeal' : meal.get('idMeal'),
+            'strMeal' : meal.get('strMeal'),
+            'strMealShort': app.Meal.truncate(meal.get('strMeal')),
+            'strMealThumb' : meal.get('strMealThumb'),
+            'previewThumb' : f'{meal.get('strMealThumb')}/preview' if meal.get('strMealThumb') else None,
+            'strInstructions' : meal.get('strInstructions'),
+            'strYoutube' : meal.get('strYoutube'),
+            'ingredients' : []
+        }
+
+        for index in range(1, 21) :
+            ingredient = meal.get(f'strIngredient{index}')
+            measure = meal.get(f'strMeasure{index}')
+            if ingredient and ingredient.strip() : cleanMeal['ingredients'].append(f'{ingredient} - {measure}')
+
+        processed.append(cleanMeal)
+
+    return processed
+
+# Memory held by processed records and processing throughput for a full-catalog-sized batch
+def benchMealRecords(count = 600, runs = 20) :
+    server = StandInServer().start()
+    # Fresh strings per meal like json.loads gives, so interning has something to share
+    full = json.loads(json.dumps([server.meal(index, full = True) for index in range(count)]))
+    slim = json.loads(json.dumps([server.meal(index) for index in range(count)]))
+    server.stop()
+
+    api = app.MealAPI(server.url, cache = app.ResponseCache(':memory:'), images = app.ImageCache(tempfile.mkdtemp()), catalog = app.MealCatalog(':memory:'))
+    results = {}
+
+    for name, process in [('dicts', legacyProcessMeals), ('records', api.processMeals)] :
+        for kind, meals in [('full', full), ('filter', slim)] :
+            tracemalloc.start()
+            kept = process(meals)
+            retained = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del kept
+
+            start = time.perf_counter()
+            for _ in range(runs) : process(meals)
+            elapsed = (time.perf_counter() - start) / runs
+
+            results[f'{name}.{kind}'] = {
+                'retainedKB' : round(retained / 1024, 1),
+                'mealsPerSecond' : round(count / elapsed)
+            }
+
+    return results
+
+# -------------------------------- RENDER SCHEDULER -------------------------------- #
+
+# Fills a grid with 99 cards, all at once vs frame-budgeted, while a 16 ms ticker stands in for input
+# Reports time to first card, time to all cards and how late the ticker got, needs a display
+def benchRender(count = 99) :
+    server = StandInServer().start()
+    api = makeApi(server)
+    meals = api.processMeals([server.meal(index) for index in range(count)])
+
+    root = app.ctk.CTk()
+    root.geometry('1400x900')
+    placeHolder = app.ctk.CTkImage(app.Image.new('RGB', app.imageSmall, 'gray'), size = app.imageSmall)
+    updates = app.UpdateQueue(root)
+    updates.start()
+    results = {}
+
+    def measure(name, fill) :
+        grid = app.MainUI(root, 4, 0)
+        grid.pack(fill = 'both', expand = True)
+        root.update()
+
+        lateness = []
+        marks = {}
+        ticking = [True]
+
+        def tick(expected) :
+            now = time.perf_counter()
+            lateness.append(max(0.0, now - expected))
+            if ticking[0] : root.after(16, tick, time.perf_counter() + 0.016)
+
+        def addCard(meal) :
+            grid.addCard(app.CardUI(grid, meal, placeHolder, api, updates))
+            marks.setdefault('first', time.perf_counter())
+            if len(grid.cards) == count : marks['all'] = time.perf_counter()
+
+        root.after(16, tick, time.perf_counter() + 0.016)
+        start = time.perf_counter()
+        fill(addCard)
+
+        while 'all' not in marks : root.update()
+        ticking[0] = False
+
+        results[name] = {
+            'firstCardMs' : round((marks['first'] - start) * 1000, 2),
+            'allCardsMs' : round((marks['all'] - start) * 1000, 2),
+            'inputLateness' : summarize(lateness) if lateness else None
+        }
+
+        grid.destroy()
+        api.scheduler.newGeneration()
+
+    def burst(addCard) :
+        root.after(0, lambda : [addCard(meal) for meal in meals])
+
+    renderer = app.RenderScheduler(root)
+
+    def budgeted(addCard) :
+        generation = renderer.start(addCard)
+        renderer.extend(generation, meals)
+        renderer.finish(generation)
+
+    measure('burst', burst)
+    measure('budgeted', budgeted)
+    results['budgeted']['frames'] = renderer.info()
+
+    root.destroy()
+    server.stop()
+    return results
+
+# -------------------------------- PAGED RESULTS -------------------------------- #
+
+# Time to the first screen of cards and widgets created, every result at once vs paged, needs a display
+def benchPages(sizes = (24, 48, 96), pageSize = 24) :
+    server = StandInServer().start()
+    api = makeApi(server)
+
+    root = app.ctk.CTk()
+    root.geometry('1400x900')
+    placeHolder = app.ctk.CTkImage(app.Image.new('RGB', app.imageSmall, 'gray'), size = app.imageSmall)
+    renderer = app.RenderScheduler(root)
+    updates = app.UpdateQueue(root)
+    updates.start()
+    results = {}
+
+    for mode in ['all', 'paged'] :
+        for size in sizes :
+            meals = api.processMeals([server.meal(index) for index in range(size)])
+            grid = app.MainUI(root, 4, 0, pageSize = pageSize)
+            grid.pack(fill = 'both', expand = True)
+            root.update()
+
+            firstScreen = min(size, pageSize)
+            marks = {}
+            submitted = api.scheduler.info()['submitted']
+
+            def addCard(meal) :
+                grid.addCard(app.CardUI(grid, meal, placeHolder, api, updates))
+                if len(grid.cards) == firstScreen : marks.setdefault('first', time.perf_counter())
+
+            start = time.perf_counter()
+            generation = renderer.start(addCard)
+
+            if mode == 'all' :
+                renderer.extend(generation, meals)
+            else :
+                grid.setPages(meals, lambda page : renderer.extend(generation, page))
+
+            renderer.finish(generation)
+            while 'first' not in marks : root.update()
+
+            # Let anything else the view asks for arrive
+            settle = time.perf_counter() + 0.5
+            while time.perf_counter() < settle : root.update()
+
+            results[f'{mode}{size}'] = {
+                'firstScreenMs' : round((marks['first'] - start) * 1000, 2),
+                'cards' : len(grid.cards),
+                'widgets' : countWidgets(root),
+                'imagesRequested' : api.scheduler.info()['submitted'] - submitted
+            }
+
+            grid.destroy()
+            api.scheduler.newGeneration()
+
+    root.destroy()
+    server.stop()
+    return results
+
+# -------------------------------- RECIPE POPUP -------------------------------- #
+
+# 100 recipe openings : a new popup built and destroyed each time vs the shared popup, needs a display
+def benchRecipePopup(openings = 100) :
+    server = StandInServer().start()
+    api = makeApi(server)
+    meals = api.processMeals([server.meal(index, full = True) for index in range(openings)])
+
+    root = app.ctk.CTk()
+    root.geometry('400x300')
+    root.update()
+    updates = app.UpdateQueue(root)
+    updates.start()
+    results = {}
+
+    def measure(name, getPopup, close) :
+        opens = []
+        closes = []
+        reopens = []
+        widgets = []
+
+        for index, meal in enumerate(meals) :
+            start = time.perf_counter()
+            popup = getPopup()
+            popup.open(meal)
+            root.update()
+            (reopens if index else opens).append(time.perf_counter() - start)
+            widgets.append(countWidgets(popup))
+
+            start = time.perf_counter()
+            close(popup)
+            root.update()
+            closes.append(time.perf_counter() - start)
+
+        results[name] = {
+            'firstOpenMs' : round(opens[0] * 1000, 2),
+            'reopen' : summarize(reopens),
+            'close' : summarize(closes),
+            'widgetsPerPopup' : max(widgets),
+            'widgetsCreated' : sum(widgets) if name == 'rebuild' else max(widgets)
+        }
+
+    # Before : every click built a whole Toplevel and closing destroyed it
+    measure('rebuild', lambda : app.RecipeUI(api, updates), lambda popup : popup.destroy())
+    measure('reuse', lambda : app.RecipeUI.shared(api, updates), lambda popup : popup.close())
+
+    root.destroy()
+    server.stop()
+    return results
+
+# -------------------------------- IMAGE DECODE -------------------------------- #
+
+def residentBytes() :
+    with open('/proc/self/statm') as file : return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+# Child process : decodes 100 copies of a 700x700 JPEG and keeps them, like 100 cards on screen
+def decodeWorker(variant, size, data, count, output) :
+    from io import BytesIO
+    from PIL import Image
+
+    images = app.ImageCache(tempfile.mkdtemp())
+    before = residentBytes()
+    kept = []
+    start = time.perf_counter()
+
+    for _ in range(count) :
+        if variant == 'full' :
+            # Before the image cache : full resolution handed to CTkImage, scaled at render time
+            image = Image.open(BytesIO(data))
+            image.load()
+        elif variant == 'resize' :
+            # Full decode then resize
+            image = Image.open(BytesIO(data)).convert('RGB').resize(size, Image.LANCZOS)
+        else :
+            image = images.decode(data, size)
+
+        kept.append(image)
+
+    output.put({
+        'decodeMsPerImage' : round((time.perf_counter() - start) / count * 1000, 3),
+        'residentMB' : round((residentBytes() - before) / 2 ** 20, 1)
+    })
+
+# Decode time and resident memory for 100 images, per target size and decode path
+def benchDecode(count = 100) :
+    data = makeJpeg(noisy = True)
+    results = {'jpegKB' : round(len(data) / 1024, 1)}
+
+    for sizeName, size in [('card', app.imageSmall), ('popup', app.imageBig)] :
+        for variant in ['full', 'resize', 'imageCache'] :
+            output = multiprocessing.Queue()
+            process = multiprocessing.Process(target = decodeWorker, args = (variant, size, data, count, output))
+            process.start()
+            results[f'{sizeName}.{variant}'] = output.get()
+            process.join()
+
+    return results
+
+# -------------------------------- END TO END -------------------------------- #
+
+# Stands in for the Tk event loop : after() callbacks run in order on the thread calling run()
+class HeadlessLoop :
+    def __init__(self) :
+        self.timers = []
+        self.cancelled = set()
+        self.order = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+
+    def after(self, ms, function, *args) :
+        with self.lock :
+            self.order += 1
+            heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, self.order, function, args))
+        self.wake.set()
+        return self.order
+
+    def after_cancel(self, afterId) :
+        self.cancelled.add(afterId)
+
+    def winfo_exists(self) :
+        return 1
+
+    # Runs callbacks until until() is true
+    def run(self, until) :
+        while not until() :
+            with self.lock :
+                due = self.timers[0][0] - time.perf_counter() if self.timers else 0.05
+                timer = heapq.heappop(self.timers) if self.timers and due <= 0 else None
+
+            if timer is None :
+                self.wake.wait(max(0.0, due))
+                self.wake.clear()
+            elif timer[1] not in self.cancelled :
+                timer[2](*timer[3])
+
+# The app's search path without a window : Application.runSearch and searchThread, the UpdateQueue,
+# MainUI.setPages and addCard, RenderScheduler.extend and CardUI's image requests
+# Cards and the grid keep the real methods that do not touch Tk, placing and drawing are skipped
+# onEvent(kind) hears 'label', 'card' and 'image' as they happen on the loop
+def headlessApplication(api, loop, onEvent) :
+    class Label :
+        def configure(self, **options) :
+            onEvent('label')
+
+    class Card :
+        requestImage = app.CardUI.requestImage
+        prefetchDetails = app.CardUI.prefetchDetails
+        loadImageAsync = app.CardUI.loadImageAsync
+        showImage = app.CardUI.showImage
+
+        def __init__(self, meal, updates) :
+            self.api = api
+            self.mealData = meal
+            self.updates = updates
+            self.alive = True
+
+        def winfo_exists(self) :
+            return int(self.alive)
+
+        def grid(self, **options) : pass
+
+        def destroy(self) :
+            self.alive = False
+
+        def setImage(self, imgPIL, url) :
+            if self.alive and self.mealData.previewThumb == url : onEvent('image')
+
+    class Grid :
+        setPages = app.MainUI.setPages
+        nextPage = app.MainUI.nextPage
+        addCard = app.MainUI.addCard
+
+        def __init__(self) :
+            self.maxColumns = 4
+            self.indexOffset = 0
+            self.virtualThreshold = 100
+            self.prefetchRows = 2
+            self.pageSize = 24
+            self.cards = []
+            self.loadLabel = Label()
+            self.clear()
+
+        def clear(self) :
+            for card in self.cards : card.destroy()
+            self.cards = []
+            self.pageRecords = []
+            self.shown = 0
+            self.loadPage = None
+
+        # Cards for the first screen, like the virtual grid's first window
+        def setRecords(self, records, cardFactory) :
+            self.clear()
+            for meal in records[:self.pageSize] : self.addCard(cardFactory(self, meal))
+
+    class Host :
+        runSearch = app.Application.runSearch
+        searchThread = app.Application.searchThread
+        afterSearch = app.Application.afterSearch
+
+        def __init__(self) :
+            self.api = api
+            self.renderer = app.RenderScheduler(loop)
+            self.updates = app.UpdateQueue(loop)
+            self.updates.start()
+            self.main = Grid()
+
+        def winfo_exists(self) :
+            return 1
+
+        def makeCard(self, parent, meal) :
+            onEvent('card')
+            return Card(meal, self.updates)
+
+    return Host()
+
+# Search and autocomplete against the stand-in with jittered latency, cold caches every time
+# Search runs the app's own path through headlessApplication, only the first page of cards is loaded as nobody scrolls
+def benchEndToEnd(latency = 0.04, jitter = 0.04, searches = 40, typed = 60) :
+    server = StandInServer(latency = latency, jitter = jitter, resultCount = None).start()
+    prompts = [('category', name) for name in categories] + [('area', name) for name in areas] + [('ingredient', name) for name in ingredientBases]
+    prompts = [prompts[index * 7 % len(prompts)] for index in range(searches)]
+
+    # One session like the app, the connection pool stays warm but nothing is cached
+    api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+    loop = HeadlessLoop()
+    marks = {}
+
+    def seen(kind) :
+        now = time.perf_counter()
+        if kind == 'label' : marks.setdefault('search', now)
+        if kind == 'card' : marks.setdefault('firstCard', now)
+
+        if kind == 'image' :
+            marks['images'] += 1
+            marks['lastImage'] = now
+
+    host = headlessApplication(api, loop, seen)
+
+    search = []
+    firstCard = []
+    pageImages = []
+    requestCounts = []
+
+    for mode, prompt in prompts :
+        api.images = app.ImageCache(tempfile.mkdtemp())
+        marks.clear()
+        marks['images'] = 0
+
+        # The loading label is set by runSearch itself, the next label update is the answer
+        def landed() :
+            if 'search' not in marks or host.updates.depth() : return False
+            if not host.renderer.finished or host.renderer.items : return False
+            return marks['images'] >= len(host.main.cards)
+
+        before = server.stats['requests']
+        start = time.perf_counter()
+        host.runSearch(prompt, mode)
+        marks.pop('search', None)
+        loop.run(landed)
+
+        search.append(marks['search'] - start)
+        if 'firstCard' in marks : firstCard.append(marks['firstCard'] - start)
+        pageImages.append(marks.get('lastImage', marks['search']) - start)
+        requestCounts.append(server.stats['requests'] - before)
+
+    # Autocomplete as Application.getAutocomplete runs it, without a window
+    words = [name.lower() for name in mealNames] + [name.lower() for name in ingredients]
+    autocomplete = {'name' : [], 'ingredient' : []}
+
+    for index in range(typed) :
+        mode = 'name' if index % 2 == 0 else 'ingredient'
+        word = words[index * 13 % len(words)][:3 + index % 4]
+        start = time.perf_counter()
+        app.Application.getAutocomplete(host, word, mode)
+        autocomplete[mode].append(time.perf_counter() - start)
+
+    server.stop()
+    return {
+        'server' : {'latencyMs' : latency * 1000, 'jitterMs' : jitter * 1000, 'searches' : searches},
+        'searchLatency' : summarize(search),
+        'timeToFirstCard' : summarize(firstCard),
+        'timeToPageImages' : summarize(pageImages),
+        'requestsPerSearch' : {'mean' : round(statistics.mean(requestCounts), 2), 'max' : max(requestCounts)},
+        'autocompleteName' : summarize(autocomplete['name']),
+        'autocompleteIngredient' : summarize(autocomplete['ingredient'])
+    }
+
+# -------------------------------- INSTRUMENTATION -------------------------------- #
+
+# Cost of a span and a counter when instrumentation is off vs on, then a traced search for the snapshot
+def benchInstruments(calls = 200000) :
+    results = {}
+
+    for enabled in [False, True] :
+        instruments = app.Instruments(enabled = enabled)
+
+        start = time.perf_counter()
+        for _ in range(calls) :
+            with instruments.span('bench') : pass
+        spanCost = (time.perf_counter() - start) / calls
+
+        start = time.perf_counter()
+        for _ in range(calls) : instruments.count('bench')
+        countCost = (time.perf_counter() - start) / calls
+
+        results['enabled' if enabled else 'disabled'] = {'spanNs' : round(spanCost * 1e9, 1), 'countNs' : round(countCost * 1e9, 1)}
+
+    # Bare loop for reference
+    start = time.perf_counter()
+    for _ in range(calls) : pass
+    results['emptyLoopNs'] = round((time.perf_counter() - start) / calls * 1e9, 1)
+
+    server = StandInServer().start()
+    app.instruments.enabled = True
+    app.instruments.reset()
+    api = makeApi(server)
+
+    for name in categories[:5] :
+        meals = api.processMeals(api.searchMeals('category', name))
+        for meal in meals : api.loadImage(meal.previewThumb, app.imageSmall)
+
+    results['snapshot'] = app.instruments.snapshot()
+    app.instruments.enabled = False
+    server.stop()
+    return results
+
+# -------------------------------- COMPOUND QUERIES -------------------------------- #
+
+# Two and three filter queries : one search per filter run back to back vs compoundSearch, cold then repeated
+def benchCompound(runs = 5) :
+    server = StandInServer(latency = 0.03, resultCount = None).start()
+    queries = ['Seafood + Italian + garlic', 'beef + garlic', 'chicken + onion + british', 'Dessert + sugar', 'Vegan + tomato + rice']
+    results = {}
+
+    # Option lists are loaded once up front, only filter requests are counted
+    indexes = {mode : makeApi(server).optionIndex(mode) for mode in ['category', 'area', 'ingredient']}
+
+    def newApi() :
+        api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+        api.optionIndexes = dict(indexes)
+        return api
+
+    def measure(name, search, fresh) :
+        samples = []
+        before = server.stats['requests']
+        api = newApi()
+
+        for _ in range(runs) :
+            for query in queries :
+                if fresh : api = newApi()
+
+                start = time.perf_counter()
+                search(api, query)
+                samples.append(time.perf_counter() - start)
+
+        results[name] = summarize(samples) | {'requestsPerQuery' : round((server.stats['requests'] - before) / (runs * len(queries)), 2)}
+
+    # What a user does today : one search per filter, comparing the lists by eye
+    def manual(api, query) :
+        sets = [{meal['idMeal'] for meal in api.searchMeals(mode, value)} for mode, value in api.parseFilters(query)]
+        return set.intersection(*sets)
+
+    def compound(api, query) :
+        return api.searchRecords('multi', query)
+
+    measure('manualCold', manual, True)
+    measure('compoundCold', compound, True)
+    measure('compoundRepeated', compound, False)
+
+    api = makeApi(server)
+    results['matches'] = {query : len(api.searchRecords('multi', query)) for query in queries}
+
+    server.stop()
+    return results
+
+# -------------------------------- NAME INDEX -------------------------------- #
+
+# Name suggestions per keystroke : search.php every time vs the local trigram index, including typos
+def benchNameIndex(runs = 20) :
+    server = StandInServer(latency = 0.03).start()
+    folder = tempfile.mkdtemp()
+    typed = ['ch', 'chi', 'chic', 'chick', 'chicken', 'chiken cury', 'beef st', 'bef stew', 'samlon', 'garlic p', 'tomatoe soup', 'rissotto']
+    results = {}
+
+    # Index filled by one broad search per dish, as browsing would
+    api = makeApi(server, names = app.NameIndex(os.path.join(folder, 'names.sqlite3')), cache = app.ResponseCache(':memory:', maxBytes = 0))
+    for dish in dishes : api.searchMeals('name', dish)
+
+    for name, suggest in [('api', lambda text : api.processMeals(api.searchMeals('name', text))[:4]), ('index', api.suggestNames)] :
+        samples = []
+        found = {}
+
+        for _ in range(runs if name == 'index' else 2) :
+            for text in typed :
+                start = time.perf_counter()
+                suggestions = suggest(text)
+                samples.append(time.perf_counter() - start)
+                found[text] = [meal.strMeal for meal in suggestions]
+
+        results[name] = summarize(samples) | {'suggestions' : found}
+
+    # Reload from disk, as on the next start
+    start = time.perf_counter()
+    reloaded = app.NameIndex(os.path.join(folder, 'names.sqlite3'))
+    results['reload'] = {'ms' : round((time.perf_counter() - start) * 1000, 3)} | reloaded.info()
+
+    # Larger index, every fixture name under 20 variants
+    big = app.NameIndex(':memory:')
+    big.add({'idMeal' : str(index), 'strMeal' : f'{mealNames[index % len(mealNames)]} {index // len(mealNames)}'} for index in range(len(mealNames) * 20))
+    samples = []
+
+    for _ in range(runs) :
+        for text in typed :
+            start = time.perf_counter()
+            big.search(text)
+            samples.append(time.perf_counter() - start)
+
+    results['index4800'] = summarize(samples)
+
+    # Swapped letters, each must still suggest the meal it was meant to be
+    typos = {'samlon' : 'salmon', 'slamon' : 'salmon', 'agrlic' : 'garlic', 'chikcen curry' : 'chicken curry', 'ptoato pie' : 'potato pie', 'tomaot soup' : 'tomato soup'}
+    found = {text : [meal.strMeal.lower() for meal in api.suggestNames(text)] for text in typos}
+    results['typos'] = {
+        'passed' : all(any(meant in name for name in found[text]) for text, meant in typos.items()),
+        'suggestions' : found,
+        'typoHits' : api.names.info()['typoHits']
+    }
+
+    server.stop()
+    return results
+
+# -------------------------------- SINGLE FLIGHT -------------------------------- #
+
+# Calls straight through, what MealAPI did before single flight
+class NoFlight :
+    def do(self, kind, key, function) :
+        return function()
+
+    def info(self) :
+        return {}
+
+# A typing and search session : name autocomplete then the search button for the same text,
+# overlapping option list loads, two searches sharing thumbnails and a popup on one of them
+def benchSingleFlight(words = ('chicken', 'beef stew', 'garlic'), keyDelay = 0.06) :
+    server = StandInServer(latency = 0.08).start()
+    results = {}
+
+    def session(api) :
+        before = server.stats['requests']
+        start = time.perf_counter()
+
+        def fetch(text, mode, limit = 4) :
+            return api.processMeals(api.searchMeals(mode, text))[:limit]
+
+        loop, stop = backgroundLoop()
+        pipeline = app.SuggestionPipeline(loop, fetch, lambda text, mode, suggestions : None)
+        threads = []
+
+        for word in words :
+            for length in range(2, len(word) + 1) :
+                loop.after(0, pipeline.keystroke, word[:length], 'name')
+                time.sleep(keyDelay)
+
+            # Enter right as the debounced suggestion request goes out for the same text
+            time.sleep(pipeline.debounceMs / 1000)
+            thread = threading.Thread(target = lambda word = word : api.searchRecords('name', word))
+            thread.start()
+            threads.append(thread)
+
+        # Ingredient typing, startup preload and the multi filter all want the lists
+        runThreads([lambda mode = mode : api.listOptions(mode) for mode in ['ingredient', 'ingredient', 'ingredient', 'area', 'area']])
+
+        # Two filters returning the same meals, their cards load the same thumbnails, then a popup opens
+        finished = threading.Semaphore(0)
+        cards = api.searchRecords('category', 'Beef') + api.searchRecords('area', 'British')
+
+        for index, meal in enumerate(cards) :
+            api.scheduler.submit(lambda meal = meal : api.loadImage(meal.previewThumb, app.imageSmall), lambda image : finished.release(), index // 4)
+
+        api.loadImage(cards[0].strMealThumb, app.imageBig)
+        for _ in cards : finished.acquire()
+        for thread in threads : thread.join()
+        time.sleep(0.3)
+        stop()
+
+        return {
+            'requests' : server.stats['requests'] - before,
+            'sessionMs' : round((time.perf_counter() - start) * 1000, 1),
+            'singleFlight' : api.flights.info()
+        }
+
+    # Memory only response cache so only in-flight duplicates can be saved
+    api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+    api.flights = NoFlight()
+    results['before'] = session(api)
+
+    api = makeApi(server, cache = app.ResponseCache(':memory:', maxBytes = 0))
+    results['singleFlight'] = session(api)
+
+    server.stop()
+    return results
+
+# -------------------------------- OPTION LISTS -------------------------------- #
+
+# Ingredient list on the next start : blocking re-download once expired vs stale-while-revalidate with ETags
+def benchOptionLists(runs = 20) :
+    server = StandInServer(latency = 0.15).start()
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, 'lists.sqlite3')
+    results = {}
+
+    # First ever load has nothing to serve
+    api = makeApi(server, lists = app.OptionLists(path))
+    start = time.perf_counter()
+    api.listOptions('ingredient')
+    results['firstEver'] = {'ms' : round((time.perf_counter() - start) * 1000, 2)}
+
+    # Before : an expired response cache entry means waiting for the whole list again
+    samples = []
+    for _ in range(runs) :
+        start = time.perf_counter()
+        api.transport.get(f'{server.url}/list.php?i=list', 'list').json()
+        samples.append(time.perf_counter() - start)
+    results['expiredRefetch'] = summarize(samples)
+
+    # Next start with a stale list : served from disk, revalidated in the background
+    samples = []
+    before = dict(server.stats)
+
+    for _ in range(runs) :
+        api = makeApi(server, lists = app.OptionLists(path, refreshAfter = 0))
+        start = time.perf_counter()
+        api.suggestOptions('ingredient', 'chi')
+        samples.append(time.perf_counter() - start)
+
+        index = api.optionIndexes['ingredient']
+        while api.scheduler.info()['completed'] == 0 : time.sleep(0.01)
+        indexKept = api.optionIndexes.get('ingredient') is index
+
+    results['staleWhileRevalidate'] = summarize(samples) | {
+        'requests' : server.stats['requests'] - before['requests'],
+        'notModified' : server.stats.get('notModified', 0) - before.get('notModified', 0),
+        'indexKept' : indexKept,
+        'lists' : api.lists.info()
+    }
+
+    # The list changes on the server : the refresh stores it and drops the index
+    ingredients.append('Saffron')
+    api = makeApi(server, lists = app.OptionLists(path, refreshAfter = 0))
+    api.suggestOptions('ingredient', 'saf')
+    while api.scheduler.info()['completed'] == 0 : time.sleep(0.01)
+    results['changed'] = {'suggestions' : api.suggestOptions('ingredient', 'saf'), 'lists' : api.lists.info()}
+    ingredients.pop()
+
+    server.stop()
+    return results
+
+# -------------------------------- UI UPDATES -------------------------------- #
+
+# Stand-in for a card, destroyed ones report they no longer exist like Tk widgets do
+class Target :
+    def __init__(self) :
+        self.alive = True
+
+    def winfo_exists(self) :
+        return int(self.alive)
+
+# Image storm : worker threads land repeats images per card while a quarter of the cards get cleared
+# Every update straight through after(0) vs the UpdateQueue, a 16 ms tick measures how late input would be handled
+def benchUpdates(cards = 400, repeats = 3, workers = 8, applyMs = 0.25, cleared = 0.25) :
+    results = {}
+    total = cards * repeats
+
+    for mode in ['direct', 'queued'] :
+        loop = HeadlessLoop()
+        updates = app.UpdateQueue(loop)
+        targets = [Target() for _ in range(cards)]
+        marks = {'handled' : 0, 'applied' : 0, 'working' : workers}
+        lateness = []
+        lock = threading.Lock()
+
+        # Stands in for configure() on a label
+        def apply(target) :
+            marks['handled'] += 1
+            if not target.winfo_exists() : return
+
+            end = time.perf_counter() + applyMs / 1000
+            while time.perf_counter() < end : pass
+            marks['applied'] += 1
+
+        def worker(index) :
+            for _ in range(repeats) :
+                for target in targets[index::workers] :
+                    if mode == 'direct' : loop.after(0, apply, target)
+                    else : updates.post(target, 'image', lambda target = target : apply(target))
+
+            with lock : marks['working'] -= 1
+
+        def tick(expected) :
+            now = time.perf_counter()
+            lateness.append(max(0.0, now - expected))
+            loop.after(16, tick, now + 0.016)
+
+        def clear() :
+            for target in targets[:int(cards * cleared)] : target.alive = False
+
+        # Done once everything is drained and the tick has run at least once
+        def landed() :
+            if marks['working'] or not lateness : return False
+            return marks['handled'] == total if mode == 'direct' else updates.depth() == 0
+
+        if mode == 'queued' : updates.start()
+        loop.after(16, tick, time.perf_counter() + 0.016)
+        loop.after(5, clear)
+
+        start = time.perf_counter()
+        for index in range(workers) : threading.Thread(target = worker, args = (index,), daemon = True).start()
+        loop.run(landed)
+
+        results[mode] = {
+            'drainMs' : round((time.perf_counter() - start) * 1000, 2),
+            'widgetUpdates' : marks['applied'],
+            'callbacks' : marks['handled'] if mode == 'direct' else updates.info()['frames'],
+            'inputLateness' : summarize(lateness) if lateness else None
+        }
+
+        if mode == 'queued' : results[mode]['queue'] = updates.info()
+
+    return results
+
+# -------------------------------- TRAFFIC CONTROL -------------------------------- #
+
+# Sends straight away, what the transport did before the traffic controller
+class NoTraffic :
+    def send(self, url, route, function) :
+        return function()
+
+    def background(self) :
+        return contextlib.nullcontext()
+
+    def available(self) :
+        return True
+
+    def info(self) :
+        return {}
+
+# Breaker timings scaled down from the app's 5 s and 30 s so an outage fits in a few seconds
+def trafficTransports() :
+    return {
+        'before' : app.MealTransport(traffic = NoTraffic()),
+        'controlled' : app.MealTransport(traffic = app.TrafficController(makeBreaker = lambda : app.CircuitBreaker(openSeconds = 0.25, maxOpenSeconds = 1)))
+    }
+
+# Runs function on threads until seconds have passed
+def runFor(seconds, functions) :
+    stop = threading.Event()
+    threads = [threading.Thread(target = function, args = (stop,), daemon = True) for function in functions]
+
+    for thread in threads : thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads : thread.join()
+
+# Overload : 48 threads pulling thumbnails like the old thread per card, a search every 200 ms on top,
+# against a server that slows down past 8 concurrent requests
+def benchTrafficOverload(duration = 4.0, imageThreads = 48) :
+    server = StandInServer(latency = 0.05, capacity = 8).start()
+    results = {}
+
+    for name, transport in trafficTransports().items() :
+        server.stats['peakActive'] = 0
+        searches = []
+        loaded = [0]
+
+        def images(stop, index) :
+            while not stop.is_set() :
+                try :
+                    transport.getBytes(f'{server.root}/images/media/meals/{index}.jpg')
+                    loaded[0] += 1
+                except Exception :
+                    pass
+                index += imageThreads
+
+        def search(stop) :
+            while not stop.is_set() :
+                start = time.perf_counter()
+                transport.get(f'{server.url}/filter.php?c=Beef')
+                searches.append(time.perf_counter() - start)
+                time.sleep(0.2)
+
+        runFor(duration, [search] + [lambda stop, index = index : images(stop, index) for index in range(imageThreads)])
+
+        results[name] = {
+            'searchLatency' : summarize(searches),
+            'imagesPerSecond' : round(loaded[0] / duration, 1),
+            'serverPeakConcurrency' : server.stats['peakActive'],
+            'traffic' : transport.traffic.info()
+        }
+
+    server.stop()
+    return results
+
+# Outage : 8 users looking up recipes, TheMealDB answers 503 to everything for a while then recovers
+def benchTrafficOutage(healthy = 1.0, outage = 2.0, healed = 2.0, users = 8) :
+    server = StandInServer(latency = 0.03).start()
+    results = {}
+
+    for name, transport in trafficTransports().items() :
+        phase = ['healthy']
+        calls = {key : {'calls' : 0, 'ok' : 0, 'failed' : 0, 'fastFailed' : 0, 'seconds' : []} for key in ['healthy', 'outage', 'healed']}
+        marks = {}
+        lock = threading.Lock()
+
+        def user(stop) :
+            while not stop.is_set() :
+                start = time.perf_counter()
+
+                try :
+                    outcome = 'ok' if transport.get(f'{server.url}/lookup.php?i=52700', 'lookup').status_code == 200 else 'failed'
+                except app.UpstreamUnavailable :
+                    outcome = 'fastFailed'
+                except Exception :
+                    outcome = 'failed'
+
+                end = time.perf_counter()
+                current = phase[0] # Calls count toward the phase they ended in
+
+                with lock :
+                    calls[current]['calls'] += 1
+                    calls[current][outcome] += 1
+                    calls[current]['seconds'].append(end - start)
+                    if current == 'healed' and outcome == 'ok' : marks.setdefault('recovered', end)
+
+                time.sleep(0.02)
+
+        # Switches the server between phases, counting the requests that reached it in each
+        def director(stop) :
+            served = {}
+            before = server.stats['requests']
+
+            for current, seconds, errorRate in [('healthy', healthy, 0.0), ('outage', outage, 1.0), ('healed', healed, 0.0)] :
+                phase[0] = current
+                server.httpd.errorRate = errorRate
+                if current == 'healed' : marks['healed'] = time.perf_counter()
+
+                time.sleep(seconds)
+                served[current] = server.stats['requests'] - before
+                before = server.stats['requests']
+
+            marks['served'] = served
+
+        runFor(healthy + outage + healed, [director] + [user] * users)
+
+        results[name] = {
+            current : {key : value for key, value in counts.items() if key != 'seconds'} | {
+                'serverRequests' : marks['served'].get(current),
+                'callLatency' : summarize(counts['seconds']) if counts['seconds'] else None
+            }
+            for current, counts in calls.items()
+        }
+
+        recovered = marks.get('recovered')
+        results[name]['recoveryMs'] = round((recovered - marks['healed']) * 1000, 1) if recovered else None
+        results[name]['breakers'] = transport.traffic.info().get('breakers')
+
+    server.stop()
+    return results
+
+# Image host down, API fine : thumbnails fail until their breaker opens, then a search must still go through
+def benchTrafficIsolation(images = 20) :
+    server = StandInServer(latency = 0.02).start()
+    imageHost = StandInServer(latency = 0.02, errorRate = 1.0).start()
+    transport = trafficTransports()['controlled']
+
+    for index in range(images) :
+        try :
+            transport.getBytes(f'{imageHost.root}/images/media/meals/{index}.jpg')
+        except Exception :
+            pass
+
+    start = time.perf_counter()
+    status = transport.get(f'{server.url}/filter.php?c=Beef').status_code
+
+    results = {
+        'imageRequestsSent' : imageHost.stats['requests'],
+        'searchStatus' : status,
+        'searchMs' : round((time.perf_counter() - start) * 1000, 2),
+        'available' : transport.traffic.available(),
+        'breakers' : transport.traffic.info()['breakers']
+    }
+
+    server.stop()
+    imageHost.stop()
+    return results
+
+def benchTraffic() :
+    return {'overload' : benchTrafficOverload(), 'outage' : benchTrafficOutage(), 'isolation' : benchTrafficIsolation()}
+
+# -------------------------------- COLD START -------------------------------- #
+
+# Fresh interpreter per run : plain import, GUI import, a CLI search and the window, each with an empty HOME
+def benchStartup(runs = 5) :
+    server = StandInServer(latency = 0.0, handshakeDelay = 0.0).start()
+    folder = os.path.dirname(os.path.abspath(__file__))
+    search = ['pythonApplication.py', 'search', 'Beef', '--mode', 'category', '--url', server.url, '--source', 'remote']
+    heavy = "import sys; print(json.dumps(sorted(name for name in ['customtkinter', 'tkinter', 'PIL', 'PIL.Image'] if name in sys.modules)))"
+
+    paths = {
+        'import' : ['-c', 'import pythonApplication'],
+        'importGui' : ['-c', 'import pythonApplication as app; app.Application'],
+        'cliSearch' : search,
+        'window' : ['-c', 'import pythonApplication as app; window = app.Application(); window.update(); window.destroy()']
+    }
+
+    results = {}
+
+    for name, arguments in paths.items() :
+        samples = []
+
+        for _ in range(runs) :
+            environment = os.environ | {'HOME' : tempfile.mkdtemp()}
+            start = time.perf_counter()
+            process = subprocess.run([sys.executable, *arguments], cwd = folder, env = environment, capture_output = True, text = True)
+            samples.append(time.perf_counter() - start)
+
+            if process.returncode != 0 :
+                results[name] = {'skipped' : process.stderr.strip().splitlines()[-1]}
+                break
+        else :
+            results[name] = summarize(samples)
+
+    # Which heavy modules each headless path ends up loading
+    environment = os.environ | {'HOME' : tempfile.mkdtemp()}
+    for name, code in [('import', 'import json, pythonApplication'), ('cliSearch', f'import json, pythonApplication as app; app.main({search[1:]!r})')] :
+        process = subprocess.run([sys.executable, '-c', f'{code}; {heavy}'], cwd = folder, env = environment, capture_output = True, text = True)
+        results[name]['guiModules'] = json.loads(process.stdout.strip().splitlines()[-1])
+
+    server.stop()
+    return results
+
+# -------------------------------- RUNNER -------------------------------- #
+
+benchmarks = {
+    'transport' : benchTransport,
+    'cache' : benchResponseCache,
+    'images' : benchImageCache,
+    'scheduler' : benchScheduler,
+    'grid' : benchVirtualGrid,
+    'options' : benchOptionIndex,
+    'suggestions' : benchSuggestions,
+    'catalog' : benchCatalog,
+    'lookups' : benchLookupMany,
+    'recipes' : benchRecipeOpen,
+    'records' : benchMealRecords,
+    'render' : benchRender,
+    'decode' : benchDecode,
+    'e2e' : benchEndToEnd,
+    'instruments' : benchInstruments,
+    'startup' : benchStartup,
+    'compound' : benchCompound,
+    'names' : benchNameIndex,
+    'pages' : benchPages,
+    'singleflight' : benchSingleFlight,
+    'lists' : benchOptionLists,
+    'popup' : benchRecipePopup,
+    'updates' : benchUpdates,
+    'traffic' : benchTraffic
+}
+
+# Runs the stand-in on its own so MealAPI(url) can be pointed at it by hand
+def serve(port = 8765, latency = 0.04, jitter = 0.04, errorRate = 0.0) :
+    server = StandInServer(latency = latency, jitter = jitter, resultCount = None, port = port, errorRate = errorRate)
+    print(f'Serving {server.url} ({len(mealNames)} meals, {latency * 1000:g} ms + up to {jitter * 1000:g} ms, {errorRate:.0%} errors)')
+    server.httpd.serve_forever()
+
+# -------------------------------- DISPLAY -------------------------------- #
+
+# Starts Xvfb for the UI benchmarks when there is no display, yields whether one is available
+@contextlib.contextmanager
+def virtualDisplay(number = 99) :
+    if os.environ.get('DISPLAY') or not shutil.which('Xvfb') :
+        yield bool(os.environ.get('DISPLAY'))
+        return
+
+    server = subprocess.Popen(['Xvfb', f':{number}', '-screen', '0', '1920x1080x24', '-nolisten', 'tcp'], stderr = subprocess.DEVNULL)
+    os.environ['DISPLAY'] = f':{number}'
+
+    try :
+        # Ready once a Tk connection succeeds
+        for attempt in range(50) :
+            try :
+                tkinter.Tk().destroy()
+                break
+            except tkinter.TclError :
+                time.sleep(0.1)
+
+        yield True
+    finally :
+        del os.environ['DISPLAY']
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__' :
+    # python benchmark.py serve [port] [latencyMs] [jitterMs] [errorRate]
+    if sys.argv[1:2] == ['serve'] :
+        options = [float(value) for value in sys.argv[2:6]]
+        serve(int(options[0]) if options else 8765, *[value / 1000 for value in options[1:3]], *options[3:])
+
+    names = sys.argv[1:] or list(benchmarks)
+    results = {}
+
+    with virtualDisplay() as display :
+        results['display'] = os.environ.get('DISPLAY') if display else None
+
+        for name in names :
+            # Only the results go to stdout, API banners and errors go to stderr so the output stays valid JSON
+            with contextlib.redirect_stdout(sys.stderr) :
+                try :
+                    results[name] = benchmarks[name]()
+                except tkinter.TclError as exception :
+                    # UI benchmarks need a display
+                    results[name] = {'skipped' : str(exception)}
+
+    print(json.dumps(results, indent = 4))
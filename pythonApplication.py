@@ -1,6 +1,24 @@
 # -------------------------------- HIERARCHY -------------------------------- #
 
+# Histogram, Instruments - Diagnostics
+# AdaptiveLimit, CircuitBreaker, TrafficController - Outbound traffic
+# MealTransport - HTTP
+# Flight, SingleFlight - Request coalescing
+# ResponseCache - Storage
+# OptionLists - Storage
+# ImageCache - Storage
+# FetchJob, FetchScheduler - Worker pool
+# OptionIndex - Search index
+# NameIndex - Search index
+# MealCatalog - Offline mirror
+# DetailCache - Recipe details
+# Meal - Record
 # MealAPI - API
+# RenderScheduler - Main thread
+# UpdateQueue - Main thread
+# SuggestionPipeline - Autocomplete
+#
+# pythonInterface.py, imported only when the window opens :
 # CardUI - Widget
 # HeaderUI - Widget
 # MainUI - Widget
@@ -11,19 +29,37 @@
 
 # Imports requests for getting API data
 import requests
+# Imports the adapter to pool and reuse connections
+from requests.adapters import HTTPAdapter
 # Imports threading to load application early while downloading data
 import threading
-# To open browser links
-import webbrowser
-
-# Imports pillow for images
-from PIL import Image
+# Imports time and random for retry backoff
+import time
+import random
+import contextlib
+# Imports sqlite3, json and os for the on-disk response cache
+import sqlite3
+import json
+import os
+# Imports sys and argparse for command line arguments
+import sys
+import argparse
+# Imports hashlib and OrderedDict for the image cache
+import hashlib
+from collections import OrderedDict, deque
+# Imports heapq for the prioritized download queue
+import heapq
+# Imports bisect for prefix lookups in the option index
+import bisect
+# Imports a thread pool for batch lookups
+from concurrent.futures import ThreadPoolExecutor, as_completed
 # Imports BytesIO for conversion
 from io import BytesIO
+# Imports urlsplit to keep one circuit breaker per host
+from urllib.parse import urlsplit
 
-# Install customtkinter
-# python -m pip install customtkinter
-import customtkinter as ctk
+# Pillow and customtkinter are imported on first use, see decode() and __getattr__()
+# so the API and command line never pay for the GUI
 
 # -------------------------------- STYLING -------------------------------- #
 
@@ -44,11 +80,1543 @@ accentCol = "#0080FF"
 backGroundCol = "#000000"
 foreGroundCol = "#101010"
 
+# -------------------------------- STORAGE -------------------------------- #
+
+# Folder for persistent caches, kept between application runs
+cacheFolder = os.path.join(os.path.expanduser('~'), '.cache', 'mealy-displayinator')
+# TheMealDB's API, other urls (e.g. --url) get caches of their own
+defaultUrl = 'https://www.themealdb.com/api/json/v1/1'
+
+# Folder for the caches of one API url, TheMealDB keeps the top folder so existing caches stay valid
+def cacheFolderFor(url) :
+    if url == defaultUrl : return cacheFolder
+    return os.path.join(cacheFolder, 'sites', hashlib.sha1(url.encode()).hexdigest()[:16])
+
+# -------------------------------- INSTRUMENTATION -------------------------------- #
+
+# Latency histogram with fixed log spaced buckets, upper bounds in seconds
+class Histogram :
+    bounds = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf')]
+
+    def __init__(self) :
+        self.buckets = [0] * len(self.bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds) :
+        self.buckets[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    # Upper bound of the bucket holding the given fraction of samples
+    def quantile(self, fraction) :
+        target = fraction * self.count
+        seen = 0
+
+        for bound, bucketCount in zip(self.bounds, self.buckets) :
+            seen += bucketCount
+            if seen >= target : return min(bound, self.max)
+
+        return self.max
+
+    def info(self) :
+        return {
+            'count' : self.count,
+            'mean_ms' : round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms' : round(self.quantile(0.50) * 1000, 3),
+            'p95_ms' : round(self.quantile(0.95) * 1000, 3),
+            'p99_ms' : round(self.quantile(0.99) * 1000, 3),
+            'max_ms' : round(self.max * 1000, 3)
+        }
+
+# Times one stage into its histogram
+class Span :
+    __slots__ = ('instruments', 'name', 'start')
+
+    def __init__(self, instruments, name) :
+        self.instruments = instruments
+        self.name = name
+
+    def __enter__(self) :
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception) :
+        self.instruments.observe(self.name, time.perf_counter() - self.start)
+
+# Named spans, counters and watched component stats, off unless MEALY_TRACE=1
+# When off span() hands back one shared no-op context and count() returns straight away
+class Instruments :
+    def __init__(self, enabled = False) :
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.nullSpan = contextlib.nullcontext()
+
+        self.started = time.perf_counter()
+        self.histograms = {}
+        self.counters = {}
+        self.watchers = {}
+        self.peakThreads = 0
+
+    def span(self, name) :
+        if not self.enabled : return self.nullSpan
+        return Span(self, name)
+
+    def observe(self, name, seconds) :
+        if not self.enabled : return
+
+        with self.lock :
+            histogram = self.histograms.get(name)
+            if histogram is None : histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            self.peakThreads = max(self.peakThreads, threading.active_count())
+
+    def count(self, name, amount = 1) :
+        if not self.enabled : return
+
+        with self.lock :
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    # info is called on every snapshot, e.g. a cache's own hit / miss stats
+    def watch(self, name, info) :
+        self.watchers[name] = info
+
+    def reset(self) :
+        with self.lock :
+            self.started = time.perf_counter()
+            self.histograms.clear()
+            self.counters.clear()
+            self.peakThreads = 0
+
+    def snapshot(self) :
+        with self.lock :
+            spans = {name : histogram.info() for name, histogram in sorted(self.histograms.items())}
+            counters = dict(sorted(self.counters.items()))
+
+        components = {}
+        for name, info in list(self.watchers.items()) :
+            try :
+                components[name] = info()
+            except Exception as exception :
+                components[name] = {'error' : str(exception)}
+
+        return {
+            'enabled' : self.enabled,
+            'uptimeSeconds' : round(time.perf_counter() - self.started, 3),
+            'threads' : {'active' : threading.active_count(), 'peak' : max(self.peakThreads, threading.active_count())},
+            'spans' : spans,
+            'counters' : counters,
+            'components' : components
+        }
+
+    # Writes a snapshot as JSON, into the cache folder unless a path is given
+    def dump(self, path = None) :
+        path = path or os.path.join(cacheFolder, f'trace-{time.strftime('%Y%m%d-%H%M%S')}.json')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+
+        with open(path, 'w') as file :
+            json.dump(self.snapshot(), file, indent = 4)
+
+        return path
+
+# Shared by every component
+instruments = Instruments(enabled = os.environ.get('MEALY_TRACE') == '1')
+
+# -------------------------------- TRAFFIC CONTROL -------------------------------- #
+
+# Raised instead of sending when TheMealDB is failing or too many requests are already waiting
+class UpstreamUnavailable(Exception) :
+    pass
+
+# Concurrency limit for one kind of traffic, grows while responses stay fast and halves when they slow down or fail
+class AdaptiveLimit :
+    def __init__(self, name, condition, initial = 8, minimum = 1, maximum = 16, tolerance = 2.0, slack = 0.05, waitSeconds = 10, yieldTo = None) :
+        self.name = name
+        self.condition = condition # Shared by every lane so a release wakes them all
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        # Slow means over tolerance times the usual latency plus slack seconds
+        self.tolerance = tolerance
+        self.slack = slack
+        self.waitSeconds = waitSeconds
+        # Lane that goes first, waiting is held back while it has requests waiting
+        self.yieldTo = yieldTo
+
+        self.inFlight = 0
+        self.waiting = 0
+        self.baseline = None # Usual latency, follows the fastest responses and drifts up slowly
+        self.lastDecrease = 0.0
+
+        self.stats = {'admitted' : 0, 'queued' : 0, 'refused' : 0, 'increases' : 0, 'decreases' : 0, 'peakInFlight' : 0}
+
+    def blocked(self) :
+        if self.inFlight >= int(self.limit) : return True
+        return self.yieldTo is not None and self.yieldTo.waiting > 0
+
+    # Waits for a free slot, False when none came up in time
+    def acquire(self) :
+        deadline = time.perf_counter() + self.waitSeconds
+
+        with self.condition :
+            if self.blocked() : self.stats['queued'] += 1
+            self.waiting += 1
+
+            try :
+                while self.blocked() :
+                    remaining = deadline - time.perf_counter()
+
+                    if remaining <= 0 :
+                        self.stats['refused'] += 1
+                        return False
+
+                    self.condition.wait(remaining)
+            finally :
+                self.waiting -= 1
+                # A lane yielding to this one may go again
+                if not self.waiting : self.condition.notify_all()
+
+            self.inFlight += 1
+            self.stats['admitted'] += 1
+            self.stats['peakInFlight'] = max(self.stats['peakInFlight'], self.inFlight)
+            return True
+
+    # Additive increase of one slot per limit's worth of good responses, multiplicative decrease otherwise
+    def release(self, latency, ok) :
+        with self.condition :
+            self.inFlight -= 1
+            slow = self.baseline is not None and latency > self.baseline * self.tolerance + self.slack
+
+            if ok : self.baseline = latency if self.baseline is None or latency < self.baseline else self.baseline + (latency - self.baseline) * 0.01
+
+            if ok and not slow :
+                if self.limit < self.maximum :
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                    self.stats['increases'] += 1
+            else :
+                # Responses from one congested round trip halve the limit once, not once each
+                now = time.perf_counter()
+
+                if now - self.lastDecrease > (self.baseline or latency) :
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self.lastDecrease = now
+                    self.stats['decreases'] += 1
+
+            self.condition.notify_all()
+
+    def info(self) :
+        with self.condition :
+            baseline = round(self.baseline * 1000, 2) if self.baseline is not None else None
+            return self.stats | {'limit' : round(self.limit, 2), 'inFlight' : self.inFlight, 'waiting' : self.waiting, 'baselineMs' : baseline}
+
+# Stops sending after repeated failures, after openSeconds one probe request decides whether to close again
+class CircuitBreaker :
+    def __init__(self, failures = 5, openSeconds = 5, maxOpenSeconds = 30) :
+        self.lock = threading.Lock()
+        self.failures = failures
+        self.openSeconds = openSeconds
+        self.maxOpenSeconds = maxOpenSeconds
+
+        # 'closed' : sending, 'open' : failing fast, 'halfOpen' : one probe in flight
+        self.state = 'closed'
+        self.streak = 0 # Failures in a row
+        self.openFor = openSeconds # Doubles every failed probe
+        self.openedAt = 0.0
+        self.probing = False
+
+        self.stats = {'opened' : 0, 'fastFails' : 0, 'probes' : 0, 'recovered' : 0}
+
+    # True when a request may be sent
+    def allow(self) :
+        with self.lock :
+            if self.state == 'open' and time.perf_counter() - self.openedAt >= self.openFor :
+                self.state = 'halfOpen'
+                self.probing = False
+
+            if self.state == 'closed' : return True
+
+            if self.state == 'halfOpen' and not self.probing :
+                self.probing = True
+                self.stats['probes'] += 1
+                return True
+
+            self.stats['fastFails'] += 1
+            return False
+
+    def record(self, ok) :
+        with self.lock :
+            if ok :
+                if self.state != 'closed' : self.stats['recovered'] += 1
+                self.state = 'closed'
+                self.streak = 0
+                self.openFor = self.openSeconds
+                self.probing = False
+                return
+
+            self.streak += 1
+
+            if self.state == 'halfOpen' :
+                self.openFor = min(self.maxOpenSeconds, self.openFor * 2)
+                self.trip()
+            elif self.state == 'closed' and self.streak >= self.failures :
+                self.trip()
+
+    def trip(self) :
+        self.state = 'open'
+        self.openedAt = time.perf_counter()
+        self.probing = False
+        self.stats['opened'] += 1
+
+    # An allowed request that was never sent, lets another one probe
+    def abandon(self) :
+        with self.lock :
+            if self.state == 'halfOpen' : self.probing = False
+
+    def info(self) :
+        with self.lock :
+            return self.stats | {'state' : self.state, 'streak' : self.streak, 'openForS' : self.openFor}
+
+# Every request to TheMealDB passes through here : one adaptive limit per kind of traffic, one breaker per host and kind
+# Interactive (search, lookup, lists) and background (thumbnails, prefetch) have separate limits,
+# and background waits while a search is waiting, so images can never hold up a search
+# A failing image host only opens its own breaker, searches keep going
+class TrafficController :
+    def __init__(self, interactive = 8, background = 4, maximum = 16, makeBreaker = None) :
+        condition = threading.Condition()
+
+        interactiveLane = AdaptiveLimit('interactive', condition, interactive, maximum = maximum, waitSeconds = 10)
+        backgroundLane = AdaptiveLimit('background', condition, background, maximum = maximum, waitSeconds = 30, yieldTo = interactiveLane)
+        self.lanes = {'interactive' : interactiveLane, 'background' : backgroundLane}
+
+        self.makeBreaker = makeBreaker or CircuitBreaker
+        self.breakers = {} # (host, lane name) → CircuitBreaker
+        self.breakerLock = threading.Lock()
+        self.local = threading.local()
+
+    # Requests made by the calling thread inside this block count as background
+    @contextlib.contextmanager
+    def background(self) :
+        previous = getattr(self.local, 'lane', None)
+        self.local.lane = 'background'
+
+        try :
+            yield
+        finally :
+            self.local.lane = previous
+
+    def laneFor(self, route) :
+        return getattr(self.local, 'lane', None) or ('background' if route == 'image' else 'interactive')
+
+    def breakerFor(self, host, lane) :
+        with self.breakerLock :
+            breaker = self.breakers.get((host, lane.name))
+            if breaker is None : breaker = self.breakers[(host, lane.name)] = self.makeBreaker()
+            return breaker
+
+    # Sends one request to url through its breaker and the lane's limit, function returns the response
+    def send(self, url, route, function) :
+        lane = self.lanes[self.laneFor(route)]
+        host = urlsplit(url).netloc
+        breaker = self.breakerFor(host, lane)
+
+        if not breaker.allow() :
+            instruments.count('traffic.fastFail')
+            raise UpstreamUnavailable(f'{host} is not responding, trying again shortly')
+
+        if not lane.acquire() :
+            breaker.abandon()
+            instruments.count(f'traffic.{lane.name}.refused')
+            raise UpstreamUnavailable(f'Too many {lane.name} requests waiting')
+
+        start = time.perf_counter()
+        ok = False
+
+        try :
+            response = function()
+            # Rate limits and server errors count as failures, a 404 is still a healthy answer
+            ok = response.status_code != 429 and response.status_code < 500
+            return response
+        finally :
+            lane.release(time.perf_counter() - start, ok)
+            breaker.record(ok)
+
+    # False while searches and lookups fail fast, image hosts do not count
+    def available(self) :
+        with self.breakerLock :
+            return not any(breaker.state == 'open' for (host, name), breaker in self.breakers.items() if name == 'interactive')
+
+    def info(self) :
+        with self.breakerLock :
+            breakers = {f'{host} {name}' : breaker.info() for (host, name), breaker in self.breakers.items()}
+
+        return {'breakers' : breakers} | {name : lane.info() for name, lane in self.lanes.items()}
+
+# -------------------------------- TRANSPORT -------------------------------- #
+
+class MealTransport :
+    def __init__(self, poolSize = 32, retries = 2, backoff = 0.25, traffic = None) :
+        self.retries = retries
+        self.backoff = backoff
+        # Adaptive concurrency limits and the circuit breaker, shared by every request
+        self.traffic = traffic or TrafficController()
+
+        # (connect, read) timeouts in seconds for each route
+        self.timeouts = {
+            'lookup' : (3.05, 10),
+            'search' : (3.05, 10),
+            'filter' : (3.05, 10),
+            'list' : (3.05, 15),
+            'image' : (3.05, 20)
+        }
+
+        # One keep-alive session shared by every thread, pool sized for the thread count
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 4, pool_maxsize = poolSize, pool_block = False, max_retries = 0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    # Route name from a TheMealDB url, e.g. ".../lookup.php?i=1" → "lookup"
+    def routeOf(self, url) :
+        for route in self.timeouts :
+            if f'/{route}.php' in url : return route
+
+        return 'image'
+
+    # Sleeps before the next attempt, exponential with full jitter
+    def sleepBackoff(self, attempt) :
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    # GET with per-route timeouts and a bounded retry budget
+    # Raises UpstreamUnavailable without sending while the breaker is open, retries stop there too
+    def get(self, url, route = None, headers = None) :
+        route = route or self.routeOf(url)
+        timeout = self.timeouts.get(route, self.timeouts['image'])
+
+        for attempt in range(self.retries + 1) :
+            lastTry = attempt == self.retries
+            instruments.count(f'http.{route}')
+            if attempt : instruments.count('http.retries')
+
+            try :
+                with instruments.span(f'http.{route}') :
+                    response = self.traffic.send(url, route, lambda : self.session.get(url, timeout = timeout, headers = headers))
+            except (requests.ConnectionError, requests.Timeout) :
+                if lastTry : raise
+                self.sleepBackoff(attempt)
+                continue
+
+            # Retry only on rate limits and server side errors
+            if (response.status_code == 429 or response.status_code >= 500) and not lastTry :
+                response.close()
+                self.sleepBackoff(attempt)
+                continue
+
+            return response
+
+    # Raw bytes, used for images
+    def getBytes(self, url) :
+        response = self.get(url, 'image')
+        response.raise_for_status()
+        return response.content
+
+# -------------------------------- SINGLE FLIGHT -------------------------------- #
+
+# One call in progress, the callers waiting on it read the result once done is set
+class Flight :
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) :
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# Identical calls made while one is still running share its result instead of repeating it
+class SingleFlight :
+    def __init__(self) :
+        self.lock = threading.Lock()
+        self.flights = {} # (kind, key) → Flight
+        self.stats = {} # Kind → calls made and duplicates collapsed
+
+    # Runs function for the first caller of a key, later callers wait and get the same result or exception
+    def do(self, kind, key, function) :
+        with self.lock :
+            counts = self.stats.setdefault(kind, {'calls' : 0, 'shared' : 0})
+            flight = self.flights.get((kind, key))
+            leader = flight is None
+
+            if leader :
+                flight = self.flights[(kind, key)] = Flight()
+                counts['calls'] += 1
+            else :
+                counts['shared'] += 1
+
+        if not leader :
+            instruments.count(f'singleFlight.{kind}.shared')
+            flight.done.wait()
+            if flight.error is not None : raise flight.error
+            return flight.result
+
+        try :
+            flight.result = function()
+            return flight.result
+        except Exception as exception :
+            flight.error = exception
+            raise
+        finally :
+            with self.lock : del self.flights[(kind, key)]
+            flight.done.set()
+
+    def info(self) :
+        with self.lock :
+            shared = sum(counts['shared'] for counts in self.stats.values())
+            return {kind : dict(counts) for kind, counts in self.stats.items()} | {'inFlight' : len(self.flights), 'duplicatesCollapsed' : shared}
+
+# -------------------------------- RESPONSE CACHE -------------------------------- #
+
+class ResponseCache :
+    def __init__(self, path = None, maxBytes = 32 * 1024 * 1024) :
+        self.path = path or os.path.join(cacheFolder, 'responses.sqlite3')
+        self.maxBytes = maxBytes
+        self.lock = threading.Lock()
+
+        # Time to live in seconds for each mode, None never expires
+        self.ttls = {
+            'id' : None, # Lookups by ID are effectively immutable
+            'name' : 24 * 3600,
+            'category' : 24 * 3600,
+            'ingredient' : 24 * 3600,
+            'area' : 24 * 3600
+        }
+
+        # Empty results expire sooner in case the meal gets added later
+        self.emptyTtl = 3600
+
+        self.stats = {'hits' : 0, 'misses' : 0, 'expired' : 0, 'evictions' : 0, 'writes' : 0}
+
+        try :
+            if self.path != ':memory:' : os.makedirs(os.path.dirname(self.path), exist_ok = True)
+            self.db = self.connect(self.path)
+        except (OSError, sqlite3.Error) as exception :
+            # Still cache in memory if the disk is unavailable
+            print('Cache error:', exception)
+            self.db = self.connect(':memory:')
+
+        self.totalBytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def connect(self, path) :
+        db = sqlite3.connect(path, check_same_thread = False, isolation_level = None)
+        # WAL without fsync on every commit keeps hits well under a millisecond
+        db.execute('PRAGMA journal_mode = WAL')
+        db.execute('PRAGMA synchronous = NORMAL')
+        db.execute(
+            '''CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL,
+                accessed REAL NOT NULL
+            )'''
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS responsesAccessed ON responses (accessed)')
+        return db
+
+    def keyOf(self, mode, prompt) :
+        return f'{mode}:{str(prompt).strip().lower()}'
+
+    def get(self, mode, prompt) :
+        key = self.keyOf(mode, prompt)
+        now = time.time()
+
+        with self.lock :
+            row = self.db.execute('SELECT body, size, expires FROM responses WHERE key = ?', (key,)).fetchone()
+
+            if row is None :
+                self.stats['misses'] += 1
+                return None
+
+            body, size, expires = row
+
+            if expires is not None and expires < now :
+                self.db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.totalBytes -= size
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            # Touch for LRU ordering
+            self.db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            self.stats['hits'] += 1
+
+        return json.loads(body)
+
+    def put(self, mode, prompt, data) :
+        key = self.keyOf(mode, prompt)
+        body = json.dumps(data, separators = (',', ':'))
+        size = len(body)
+        now = time.time()
+
+        ttl = self.ttls.get(mode) if data.get('meals') else self.emptyTtl
+        expires = None if ttl is None else now + ttl
+
+        # Never store a single response bigger than the whole budget
+        if size > self.maxBytes : return
+
+        with self.lock :
+            old = self.db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            if old : self.totalBytes -= old[0]
+
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)', (key, body, size, expires, now))
+            self.totalBytes += size
+            self.stats['writes'] += 1
+
+            self.evict()
+
+    # Drops least recently used entries until the cache fits the byte budget
+    def evict(self) :
+        while self.totalBytes > self.maxBytes :
+            row = self.db.execute('SELECT key, size FROM responses ORDER BY accessed LIMIT 1').fetchone()
+            if row is None : break
+
+            self.db.execute('DELETE FROM responses WHERE key = ?', (row[0],))
+            self.totalBytes -= row[1]
+            self.stats['evictions'] += 1
+
+    def clear(self) :
+        with self.lock :
+            self.db.execute('DELETE FROM responses')
+            self.totalBytes = 0
+
+    # Hit/miss counters plus current size
+    def info(self) :
+        with self.lock :
+            entries = self.db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+        lookups = self.stats['hits'] + self.stats['misses']
+        hitRate = self.stats['hits'] / lookups if lookups else 0.0
+
+        return self.stats | {'entries' : entries, 'bytes' : self.totalBytes, 'maxBytes' : self.maxBytes, 'hitRate' : round(hitRate, 3)}
+
+# -------------------------------- OPTION LISTS -------------------------------- #
+
+# Last known category, ingredient and area lists with their HTTP validators and a content hash
+# Always answered from here once known, refreshed in the background when older than refreshAfter
+class OptionLists :
+    def __init__(self, path = None, refreshAfter = 24 * 3600) :
+        self.path = path or os.path.join(cacheFolder, 'lists.sqlite3')
+        self.refreshAfter = refreshAfter
+        self.lock = threading.Lock()
+
+        self.entries = {} # Mode → {'data', 'etag', 'modified', 'digest', 'fetched'}
+        self.stats = {'hits' : 0, 'misses' : 0, 'staleServed' : 0, 'notModified' : 0, 'unchanged' : 0, 'changed' : 0}
+
+        try :
+            if self.path != ':memory:' : os.makedirs(os.path.dirname(self.path), exist_ok = True)
+            self.db = sqlite3.connect(self.path, check_same_thread = False, isolation_level = None)
+        except (OSError, sqlite3.Error) as exception :
+            print('Option list error:', exception)
+            self.db = sqlite3.connect(':memory:', check_same_thread = False, isolation_level = None)
+
+        self.db.execute(
+            '''CREATE TABLE IF NOT EXISTS lists (
+                mode TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                modified TEXT,
+                digest TEXT NOT NULL,
+                fetched REAL NOT NULL
+            )'''
+        )
+
+        with self.lock :
+            for mode, body, etag, modified, digest, fetched in self.db.execute('SELECT * FROM lists') :
+                self.entries[mode] = {'data' : json.loads(body), 'etag' : etag, 'modified' : modified, 'digest' : digest, 'fetched' : fetched}
+
+    def digestOf(self, data) :
+        return hashlib.sha256(json.dumps(data, sort_keys = True, separators = (',', ':')).encode()).hexdigest()
+
+    # Last known list however old, or None
+    def get(self, mode) :
+        with self.lock :
+            entry = self.entries.get(mode)
+            self.stats['hits' if entry else 'misses'] += 1
+            if entry and self.isStale(entry) : self.stats['staleServed'] += 1
+            return entry['data'] if entry else None
+
+    def isStale(self, entry) :
+        return time.time() - entry['fetched'] > self.refreshAfter
+
+    def needsRefresh(self, mode) :
+        with self.lock :
+            entry = self.entries.get(mode)
+            return entry is None or self.isStale(entry)
+
+    # Known but stale, lists never fetched from the API are not due
+    def isDue(self, mode) :
+        with self.lock :
+            entry = self.entries.get(mode)
+            return entry is not None and self.isStale(entry)
+
+    # Conditional request headers for the next refresh
+    def validators(self, mode) :
+        with self.lock :
+            entry = self.entries.get(mode) or {}
+
+        headers = {}
+        if entry.get('etag') : headers['If-None-Match'] = entry['etag']
+        if entry.get('modified') : headers['If-Modified-Since'] = entry['modified']
+        return headers
+
+    # Server answered 304, the stored list is fresh again
+    def notModified(self, mode) :
+        with self.lock :
+            self.stats['notModified'] += 1
+            if mode in self.entries : self.touch(mode)
+            return self.entries[mode]['data'] if mode in self.entries else None
+
+    # Content hash of the stored list, None before the first load
+    def digest(self, mode) :
+        with self.lock :
+            entry = self.entries.get(mode)
+            return entry['digest'] if entry else None
+
+    # Stores a full response, True when the content differs from what was known
+    def put(self, mode, data, etag = None, modified = None) :
+        digest = self.digestOf(data)
+
+        with self.lock :
+            old = self.entries.get(mode)
+            changed = old is None or old['digest'] != digest
+            self.stats['changed' if changed else 'unchanged'] += 1
+
+            self.entries[mode] = {'data' : data if changed else old['data'], 'etag' : etag, 'modified' : modified, 'digest' : digest, 'fetched' : time.time()}
+            body = json.dumps(self.entries[mode]['data'], separators = (',', ':'))
+
+            try :
+                self.db.execute('INSERT OR REPLACE INTO lists VALUES (?, ?, ?, ?, ?, ?)', (mode, body, etag, modified, digest, self.entries[mode]['fetched']))
+            except sqlite3.Error as exception :
+                print('Option list error:', exception)
+
+        return changed
+
+    def touch(self, mode) :
+        self.entries[mode]['fetched'] = time.time()
+
+        try :
+            self.db.execute('UPDATE lists SET fetched = ? WHERE mode = ?', (self.entries[mode]['fetched'], mode))
+        except sqlite3.Error as exception :
+            print('Option list error:', exception)
+
+    def info(self) :
+        with self.lock :
+            ages = {mode : round(time.time() - entry['fetched']) for mode, entry in self.entries.items()}
+            return self.stats | {'ageSeconds' : ages}
+
+# -------------------------------- IMAGE CACHE -------------------------------- #
+
+class ImageCache :
+    def __init__(self, folder = None, maxPixelBytes = 64 * 1024 * 1024, maxDiskBytes = 128 * 1024 * 1024) :
+        self.folder = folder or os.path.join(cacheFolder, 'images')
+        self.maxPixelBytes = maxPixelBytes
+        self.maxDiskBytes = maxDiskBytes
+        self.lock = threading.Lock()
+
+        # Memory tier : (url, size) → decoded and resized image, least recently used first
+        self.memory = OrderedDict()
+        self.pixelBytes = 0
+
+        self.stats = {'memoryHits' : 0, 'diskHits' : 0, 'misses' : 0, 'memoryEvictions' : 0, 'diskEvictions' : 0}
+
+        # Disk tier : raw bytes stored under their sha256, with an index from url to digest
+        try :
+            os.makedirs(self.folder, exist_ok = True)
+            self.db = sqlite3.connect(os.path.join(self.folder, 'index.sqlite3'), check_same_thread = False, isolation_level = None)
+        except (OSError, sqlite3.Error) as exception :
+            print('Image cache error:', exception)
+            self.folder = None
+            self.db = sqlite3.connect(':memory:', check_same_thread = False, isolation_level = None)
+
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS images (url TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)')
+        self.diskBytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM images').fetchone()[0]
+
+    def pathOf(self, digest) :
+        return os.path.join(self.folder, digest[:2], digest)
+
+    # ---------------- Memory tier ---------------- #
+
+    def memoryGet(self, key) :
+        with self.lock :
+            image = self.memory.get(key)
+            if image is not None : self.memory.move_to_end(key)
+            return image
+
+    def memoryPut(self, key, image) :
+        cost = image.width * image.height * len(image.getbands())
+
+        with self.lock :
+            if key in self.memory : return
+            self.memory[key] = image
+            self.pixelBytes += cost
+
+            while self.pixelBytes > self.maxPixelBytes and len(self.memory) > 1 :
+                _, old = self.memory.popitem(last = False)
+                self.pixelBytes -= old.width * old.height * len(old.getbands())
+                self.stats['memoryEvictions'] += 1
+
+    # ---------------- Disk tier ---------------- #
+
+    def diskGet(self, url) :
+        if not self.folder : return None
+
+        with self.lock :
+            row = self.db.execute('SELECT digest FROM images WHERE url = ?', (url,)).fetchone()
+            if row : self.db.execute('UPDATE images SET accessed = ? WHERE url = ?', (time.time(), url))
+
+        if not row : return None
+
+        try :
+            with open(self.pathOf(row[0]), 'rb') as file : return file.read()
+        except OSError :
+            return None
+
+    def diskPut(self, url, data) :
+        if not self.folder : return
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.pathOf(digest)
+
+        try :
+            # Identical bytes from different urls are only stored once
+            if not os.path.exists(path) :
+                os.makedirs(os.path.dirname(path), exist_ok = True)
+                temp = f'{path}.{threading.get_ident()}.tmp'
+                with open(temp, 'wb') as file : file.write(data)
+                os.replace(temp, path)
+        except OSError as exception :
+            print('Image cache error:', exception)
+            return
+
+        with self.lock :
+            old = self.db.execute('SELECT size FROM images WHERE url = ?', (url,)).fetchone()
+            if old : self.diskBytes -= old[0]
+
+            self.db.execute('INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?)', (url, digest, len(data), time.time()))
+            self.diskBytes += len(data)
+
+            self.diskEvict()
+
+    def diskEvict(self) :
+        while self.diskBytes > self.maxDiskBytes :
+            row = self.db.execute('SELECT url, digest, size FROM images ORDER BY accessed LIMIT 1').fetchone()
+            if row is None : break
+
+            url, digest, size = row
+            self.db.execute('DELETE FROM images WHERE url = ?', (url,))
+            self.diskBytes -= size
+            self.stats['diskEvictions'] += 1
+
+            # Remove the file once no other url points at the same content
+            if not self.db.execute('SELECT 1 FROM images WHERE digest = ?', (digest,)).fetchone() :
+                try : os.remove(self.pathOf(digest))
+                except OSError : pass
+
+    # ---------------- Loading ---------------- #
+
+    # Decodes straight to near the target size, then resizes to exactly it
+    # JPEG draft mode lets the decoder scale by 1/2, 1/4 or 1/8 while decoding,
+    # only worth it when the target is at most half the source, e.g. thumbnails but not the popup image
+    def decode(self, data, size) :
+        from PIL import Image
+
+        image = Image.open(BytesIO(data))
+        if size[0] * 2 <= image.width and size[1] * 2 <= image.height : image.draft('RGB', size)
+        image = image.convert('RGB')
+
+        if image.size != size : image = image.resize(size, Image.LANCZOS, reducing_gap = 2.0)
+        return image
+
+    # Workers share the cache, stats change under the lock like the tiers
+    def count(self, name) :
+        with self.lock :
+            self.stats[name] += 1
+
+    # Returns a decoded image at the given size, memory → disk → network
+    def load(self, url, size, fetch) :
+        key = (url, size)
+
+        image = self.memoryGet(key)
+        if image is not None :
+            self.count('memoryHits')
+            return image
+
+        data = self.diskGet(url)
+
+        if data is not None :
+            self.count('diskHits')
+        else :
+            self.count('misses')
+            data = fetch(url)
+            self.diskPut(url, data)
+
+        with instruments.span('image.decode') : image = self.decode(data, size)
+        self.memoryPut(key, image)
+        return image
+
+    def info(self) :
+        with self.lock :
+            return self.stats | {
+                'memoryEntries' : len(self.memory),
+                'pixelBytes' : self.pixelBytes,
+                'maxPixelBytes' : self.maxPixelBytes,
+                'diskBytes' : self.diskBytes,
+                'maxDiskBytes' : self.maxDiskBytes
+            }
+
+# -------------------------------- FETCH SCHEDULER -------------------------------- #
+
+class FetchJob :
+    __slots__ = ('priority', 'order', 'generation', 'cancellable', 'key', 'alive', 'work', 'done')
+
+    def __init__(self, priority, order, generation, cancellable, key, work, done) :
+        self.priority = priority
+        self.order = order
+        self.generation = generation
+        self.cancellable = cancellable
+        self.key = key
+        self.alive = True
+        self.work = work
+        self.done = done
+
+    # Heap order : lowest priority first, then first come first served
+    def __lt__(self, other) :
+        return (self.priority, self.order) < (other.priority, other.order)
+
+class FetchScheduler :
+    def __init__(self, workers = 6) :
+        self.workerCount = workers
+        self.workers = []
+        self.queue = [] # Heap of FetchJob
+        self.keyed = {} # Latest job per key, e.g. per card
+        self.order = 0
+        self.condition = threading.Condition()
+
+        # Bumped on every new search, older work is dropped
+        self.generation = 0
+        self.generationStart = time.perf_counter()
+        self.firstResult = None
+
+        self.busy = 0
+        self.stats = {'submitted' : 0, 'completed' : 0, 'cancelled' : 0, 'discarded' : 0, 'peakBusy' : 0, 'peakThreads' : threading.active_count()}
+
+    # Starts a new generation, queued and in-flight work from older ones is dropped
+    def newGeneration(self) :
+        with self.condition :
+            self.generation += 1
+            self.generationStart = time.perf_counter()
+            self.firstResult = None
+
+            # Drop queued work right away instead of waiting for workers to reach it
+            kept = []
+
+            for job in self.queue :
+                if not self.isStale(job) :
+                    kept.append(job)
+                    continue
+
+                # Keyed entries would otherwise hold the dropped job and its card forever
+                self.forget(job)
+                self.stats['cancelled'] += 1
+
+            self.queue = kept
+            heapq.heapify(self.queue)
+
+            return self.generation
+
+    # Runs work() on a worker, then done(result) if it is still wanted
+    # A new job with the same key replaces the older one, e.g. a card rebound to another meal
+    def submit(self, work, done, priority = 0, cancellable = True, key = None) :
+        with self.condition :
+            job = FetchJob(priority, self.order, self.generation, cancellable, key, work, done)
+            heapq.heappush(self.queue, job)
+            self.order += 1
+            self.stats['submitted'] += 1
+
+            if key is not None :
+                old = self.keyed.get(key)
+                if old : old.alive = False
+                self.keyed[key] = job
+
+            # Workers start lazily, never more than the pool size
+            if len(self.workers) < self.workerCount and len(self.workers) < len(self.queue) + self.busy :
+                worker = threading.Thread(target = self.workerLoop, daemon = True)
+                self.workers.append(worker)
+                worker.start()
+                self.stats['peakThreads'] = max(self.stats['peakThreads'], threading.active_count())
+
+            self.condition.notify()
+
+    def isStale(self, job) :
+        return not job.alive or (job.cancellable and job.generation != self.generation)
+
+    def forget(self, job) :
+        if job.key is not None and self.keyed.get(job.key) is job : del self.keyed[job.key]
+
+    def workerLoop(self) :
+        while True :
+            with self.condition :
+                while not self.queue : self.condition.wait()
+
+                job = heapq.heappop(self.queue)
+
+                if self.isStale(job) :
+                    self.forget(job)
+                    self.stats['cancelled'] += 1
+                    continue
+
+                self.busy += 1
+                self.stats['peakBusy'] = max(self.stats['peakBusy'], self.busy)
+
+            try :
+                result = job.work()
+            except Exception as exception :
+                print('Fetch error:', exception)
+                result = None
+
+            with self.condition :
+                self.busy -= 1
+                self.forget(job)
+
+                # Finished after a newer search or rebind, nobody is waiting for it anymore
+                if self.isStale(job) :
+                    self.stats['discarded'] += 1
+                    continue
+
+                self.stats['completed'] += 1
+                if self.firstResult is None : self.firstResult = time.perf_counter() - self.generationStart
+
+            job.done(result)
+
+    # Throughput, peak threads and time to first result for the current generation
+    def info(self) :
+        with self.condition :
+            elapsed = time.perf_counter() - self.generationStart
+
+            return self.stats | {
+                'generation' : self.generation,
+                'queued' : len(self.queue),
+                'busy' : self.busy,
+                'workers' : len(self.workers),
+                'firstResultMs' : None if self.firstResult is None else round(self.firstResult * 1000, 2),
+                'throughputPerSecond' : round(self.stats['completed'] / elapsed, 2) if elapsed else 0.0
+            }
+
+# -------------------------------- OPTION INDEX -------------------------------- #
+
+class OptionIndex :
+    def __init__(self, items) :
+        self.items = list(items)
+        self.lowered = [item.lower() for item in self.items]
+
+        # Sorted (text, index) pairs for prefix lookups with bisect
+        self.sortedKeys = sorted((text, index) for index, text in enumerate(self.lowered))
+
+        # Bigram → item indices, every query of 2+ characters has at least one bigram
+        self.postings = {}
+
+        for index, text in enumerate(self.lowered) :
+            for gram in {text[position : position + 2] for position in range(len(text) - 1)} :
+                self.postings.setdefault(gram, []).append(index)
+
+    # Items starting with text, alphabetical
+    def prefixMatches(self, text) :
+        start = bisect.bisect_left(self.sortedKeys, (text, -1))
+        matches = []
+
+        for key, index in self.sortedKeys[start:] :
+            if not key.startswith(text) : break
+            matches.append(index)
+
+        return matches
+
+    # Items containing text anywhere, candidates come from the rarest bigram
+    def substringMatches(self, text) :
+        if len(text) < 2 : return [index for index, item in enumerate(self.lowered) if text in item]
+
+        grams = [self.postings.get(text[position : position + 2], []) for position in range(len(text) - 1)]
+        candidates = min(grams, key = len)
+        return [index for index in candidates if text in self.lowered[index]]
+
+    # Ranked matches : prefix matches first, then by where the text appears and length
+    def search(self, text, limit = 4) :
+        text = text.lower().strip()
+        if not text : return []
+
+        prefix = self.prefixMatches(text)
+        ranked = list(prefix)
+
+        if limit is None or len(ranked) < limit :
+            seen = set(prefix)
+            inner = [index for index in self.substringMatches(text) if index not in seen]
+            inner.sort(key = lambda index : (self.lowered[index].find(text), len(self.lowered[index]), self.lowered[index]))
+            ranked += inner
+
+        return [self.items[index] for index in ranked[:limit]]
+
+    # The item equal to text ignoring case, or None
+    def find(self, text) :
+        text = text.lower().strip()
+        position = bisect.bisect_left(self.sortedKeys, (text, -1))
+
+        if position < len(self.sortedKeys) and self.sortedKeys[position][0] == text :
+            return self.items[self.sortedKeys[position][1]]
+
+        return None
+
+# -------------------------------- NAME INDEX -------------------------------- #
+
+# Typo tolerant meal name index over trigram postings, filled from search results and kept on disk
+class NameIndex :
+    def __init__(self, path = None, threshold = 0.3) :
+        self.path = path or os.path.join(cacheFolder, 'names.sqlite3')
+        self.threshold = threshold # Lowest trigram similarity that still counts as a match
+        self.lock = threading.Lock()
+
+        self.meals = {} # ID → (name, thumbnail)
+        self.lowered = {} # ID → lowercase name
+        self.gramCounts = {} # ID → distinct trigrams in the padded name
+        self.postings = {} # Trigram → IDs
+
+        self.stats = {'searches' : 0, 'hits' : 0, 'misses' : 0, 'typoHits' : 0, 'added' : 0}
+
+        try :
+            if self.path != ':memory:' : os.makedirs(os.path.dirname(self.path), exist_ok = True)
+            self.db = sqlite3.connect(self.path, check_same_thread = False, isolation_level = None)
+        except (OSError, sqlite3.Error) as exception :
+            print('Name index error:', exception)
+            self.db = sqlite3.connect(':memory:', check_same_thread = False, isolation_level = None)
+
+        self.db.execute('CREATE TABLE IF NOT EXISTS names (id TEXT PRIMARY KEY, name TEXT NOT NULL, thumb TEXT)')
+
+        with self.lock :
+            for mealId, name, thumb in self.db.execute('SELECT id, name, thumb FROM names') : self.index(mealId, name, thumb)
+
+    # Names are padded so the first and last letters get their own trigrams
+    # A query is only padded in front, the user is usually still typing its end
+    def gramsOf(self, text, padEnd = True) :
+        text = f'  {text}{' ' if padEnd else ''}'
+        return {text[position : position + 3] for position in range(len(text) - 2)}
+
+    def index(self, mealId, name, thumb) :
+        if mealId in self.lowered :
+            for gram in self.gramsOf(self.lowered[mealId]) : self.postings[gram].discard(mealId)
+
+        self.meals[mealId] = (name, thumb)
+        self.lowered[mealId] = name.lower()
+        grams = self.gramsOf(self.lowered[mealId])
+        self.gramCounts[mealId] = len(grams)
+        for gram in grams : self.postings.setdefault(gram, set()).add(mealId)
+
+    # Adds raw meals or Meal records, only new or renamed ones are written
+    def add(self, meals) :
+        with self.lock :
+            changed = [
+                (meal['idMeal'], meal['strMeal'], meal.get('strMealThumb'))
+                for meal in meals
+                if meal.get('idMeal') and meal.get('strMeal') and self.meals.get(meal['idMeal']) != (meal['strMeal'], meal.get('strMealThumb'))
+            ]
+
+            if not changed : return
+
+            for mealId, name, thumb in changed : self.index(mealId, name, thumb)
+            self.stats['added'] += len(changed)
+
+            # The connection is shared by every thread, writes stay under the lock
+            try :
+                self.db.executemany('INSERT OR REPLACE INTO names VALUES (?, ?, ?)', changed)
+            except sqlite3.Error as exception :
+                print('Name index error:', exception)
+
+    # (-score, length, name, ID) for every name scoring over the threshold, best first, lock held
+    def rank(self, text) :
+        grams = self.gramsOf(text, padEnd = False)
+        shared = {}
+
+        for gram in grams :
+            for mealId in self.postings.get(gram, ()) : shared[mealId] = shared.get(mealId, 0) + 1
+
+        ranked = []
+
+        for mealId, count in shared.items() :
+            name = self.lowered[mealId]
+            score = 2 * count / (len(grams) + self.gramCounts[mealId]) # Dice coefficient over distinct trigrams
+
+            if name.startswith(text) : score += 1.0
+            elif f' {text}' in name : score += 0.5
+            elif text in name : score += 0.25
+
+            if score >= self.threshold : ranked.append((-score, len(name), name, mealId))
+
+        ranked.sort()
+        return ranked
+
+    # The text with two neighbouring letters swapped, "samlon" → "salmon" among them
+    def transpositions(self, text) :
+        return {text[:index] + text[index + 1] + text[index] + text[index + 2:] for index in range(len(text) - 1) if text[index] != text[index + 1]}
+
+    # Ranked Meal records : trigram similarity, boosted when the name starts with the text or a word does
+    # Nothing close falls back to the text with one pair of letters swapped, a swap breaks up to three trigrams
+    def search(self, text, limit = 4) :
+        text = text.lower().strip()
+        if len(text) < 2 : return []
+
+        with self.lock :
+            self.stats['searches'] += 1
+            ranked = self.rank(text)
+
+            if not ranked and len(text) <= 24 :
+                best = {}
+
+                for variant in self.transpositions(text) :
+                    for entry in self.rank(variant) :
+                        if entry[3] not in best or entry < best[entry[3]] : best[entry[3]] = entry
+
+                ranked = sorted(best.values())
+                if ranked : self.stats['typoHits'] += 1
+
+            matches = [self.meals[mealId] + (mealId,) for _, _, _, mealId in ranked[:limit]]
+            self.stats['hits' if matches else 'misses'] += 1
+
+        return [Meal({'idMeal' : mealId, 'strMeal' : name, 'strMealThumb' : thumb}) for name, thumb, mealId in matches]
+
+    def info(self) :
+        with self.lock :
+            return self.stats | {'names' : len(self.meals), 'trigrams' : len(self.postings)}
+
+# -------------------------------- OFFLINE CATALOG -------------------------------- #
+
+class MealCatalog :
+    def __init__(self, path = None) :
+        self.path = path or os.path.join(cacheFolder, 'catalog.sqlite3')
+        self.lock = threading.Lock()
+
+        self.meals = {} # ID → raw meal without empty fields
+        # Inverted indexes : lowercase value → meal IDs
+        self.indexes = {'category' : {}, 'area' : {}, 'ingredient' : {}}
+        # Lowercase value → display name, for the list modes
+        self.names = {'category' : {}, 'area' : {}, 'ingredient' : {}}
+
+        try :
+            if self.path != ':memory:' : os.makedirs(os.path.dirname(self.path), exist_ok = True)
+            self.db = sqlite3.connect(self.path, check_same_thread = False, isolation_level = None)
+        except (OSError, sqlite3.Error) as exception :
+            print('Catalog error:', exception)
+            self.db = sqlite3.connect(':memory:', check_same_thread = False, isolation_level = None)
+
+        self.db.execute('CREATE TABLE IF NOT EXISTS meals (id TEXT PRIMARY KEY, body TEXT NOT NULL)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS postings (field TEXT NOT NULL, value TEXT NOT NULL, name TEXT NOT NULL, id TEXT NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS postingsId ON postings (id)')
+
+        self.load()
+
+    def load(self) :
+        with self.lock :
+            for mealId, body in self.db.execute('SELECT id, body FROM meals') :
+                self.meals[mealId] = json.loads(body)
+
+            # Postings are precomputed at harvest time, only loaded here
+            for field, value, name, mealId in self.db.execute('SELECT field, value, name, id FROM postings') :
+                self.indexes[field].setdefault(value, []).append(mealId)
+                self.names[field][value] = name
+
+    def ready(self) :
+        return bool(self.meals)
+
+    def ids(self) :
+        with self.lock :
+            return set(self.meals)
+
+    def normalize(self, value) :
+        return str(value).replace('_', ' ').strip().lower()
+
+    # Category, area and ingredient values of a raw meal
+    def postingsOf(self, meal) :
+        if meal.get('strCategory') : yield 'category', meal['strCategory']
+        if meal.get('strArea') : yield 'area', meal['strArea']
+
+        for index in range(1, 21) :
+            ingredient = meal.get(f'strIngredient{index}')
+            if ingredient and ingredient.strip() : yield 'ingredient', ingredient.strip()
+
+    # Adds or replaces full meals from lookup.php
+    def store(self, meals) :
+        with self.lock :
+            self.db.execute('BEGIN')
+
+            for meal in meals :
+                mealId = meal['idMeal']
+
+                # Compact : drop the empty strIngredientN / strMeasureN slots and null fields
+                compact = {key : value for key, value in meal.items() if value and str(value).strip()}
+                self.db.execute('INSERT OR REPLACE INTO meals VALUES (?, ?)', (mealId, json.dumps(compact, separators = (',', ':'))))
+                self.db.execute('DELETE FROM postings WHERE id = ?', (mealId,))
+
+                if mealId in self.meals : self.unindex(mealId)
+                self.meals[mealId] = compact
+
+                for field, name in set(self.postingsOf(compact)) :
+                    value = self.normalize(name)
+                    self.db.execute('INSERT INTO postings VALUES (?, ?, ?, ?)', (field, value, name, mealId))
+                    self.indexes[field].setdefault(value, []).append(mealId)
+                    self.names[field].setdefault(value, name)
+
+            self.db.execute('COMMIT')
+
+    def unindex(self, mealId) :
+        for field, name in set(self.postingsOf(self.meals[mealId])) :
+            ids = self.indexes[field].get(self.normalize(name), [])
+            if mealId in ids : ids.remove(mealId)
+
+    # Answers a request mode the same shape as the API, {'meals' : [...] or None}
+    def query(self, mode, prompt) :
+        text = self.normalize(prompt)
+
+        with self.lock :
+            if mode == 'id' :
+                meals = [self.meals[str(prompt).strip()]] if str(prompt).strip() in self.meals else []
+            elif mode == 'name' :
+                meals = [meal for meal in self.meals.values() if text in meal.get('strMeal', '').lower()]
+            elif mode in self.indexes :
+                meals = [self.meals[mealId] for mealId in self.indexes[mode].get(text, [])]
+            else :
+                meals = []
+
+        return {'meals' : meals or None}
+
+    # Same shape as the list.php endpoints
+    def listOptions(self, mode) :
+        keys = {'category' : 'strCategory', 'ingredient' : 'strIngredient', 'area' : 'strArea'}
+
+        with self.lock :
+            names = sorted(name for value, name in self.names[mode].items() if self.indexes[mode].get(value))
+
+        return {'meals' : [{keys[mode] : name} for name in names] or None}
+
+    def info(self) :
+        with self.lock :
+            return {
+                'meals' : len(self.meals),
+                'categories' : len(self.indexes['category']),
+                'areas' : len(self.indexes['area']),
+                'ingredients' : len(self.indexes['ingredient'])
+            }
+
+# -------------------------------- DETAIL CACHE -------------------------------- #
+
+class DetailCache :
+    def __init__(self, lookup, maxEntries = 128) :
+        self.lookup = lookup # lookup(mealId) → processed full meal or None
+        self.maxEntries = maxEntries
+        self.lock = threading.Lock()
+
+        self.entries = OrderedDict() # ID → processed full meal, least recently used first
+        self.inFlight = {} # ID → Event set once the lookup finishes
+
+        self.stats = {'hits' : 0, 'misses' : 0, 'prefetches' : 0, 'evictions' : 0}
+        # Click to popup timings, blocked is main thread time, ready is until details show
+        self.opens = deque(maxlen = 256)
+
+    # Cached details or None, never blocks
+    def get(self, mealId) :
+        with self.lock :
+            meal = self.entries.get(mealId)
+
+            if meal is None :
+                self.stats['misses'] += 1
+            else :
+                self.entries.move_to_end(mealId)
+                self.stats['hits'] += 1
+
+            return meal
+
+    # Blocking load, waits for a prefetch already running for the same ID
+    def load(self, mealId) :
+        with self.lock :
+            if mealId in self.entries : return self.entries[mealId]
+
+            event = self.inFlight.get(mealId)
+            owner = event is None
+            if owner : event = self.inFlight[mealId] = threading.Event()
+
+        if not owner :
+            event.wait()
+            with self.lock : return self.entries.get(mealId)
+
+        meal = None
+
+        try :
+            meal = self.lookup(mealId)
+        finally :
+            with self.lock :
+                del self.inFlight[mealId]
+                if meal is not None : self.store(mealId, meal)
+            event.set()
+
+        return meal
+
+    def store(self, mealId, meal) :
+        self.entries[mealId] = meal
+        self.entries.move_to_end(mealId)
+
+        while len(self.entries) > self.maxEntries :
+            self.entries.popitem(last = False)
+            self.stats['evictions'] += 1
+
+    # Speculative load through submit(work), skipped when cached or already loading
+    def prefetch(self, mealId, submit) :
+        with self.lock :
+            if mealId in self.entries or mealId in self.inFlight : return
+            self.stats['prefetches'] += 1
+
+        submit(lambda : self.load(mealId))
+
+    def recordOpen(self, warm, blocked, ready) :
+        self.opens.append({'warm' : warm, 'blockedMs' : round(blocked * 1000, 2), 'readyMs' : round(ready * 1000, 2)})
+
+    def info(self) :
+        with self.lock :
+            opens = list(self.opens)
+
+        summary = {}
+
+        for name, warm in [('warm', True), ('cold', False)] :
+            ready = sorted(entry['readyMs'] for entry in opens if entry['warm'] == warm)
+            if ready : summary[f'{name}ReadyMsP50'] = ready[len(ready) // 2]
+
+        return self.stats | summary | {'entries' : len(self.entries), 'opens' : len(opens)}
+
+# -------------------------------- MEAL RECORD -------------------------------- #
+
+class Meal :
+    # Slots keep every record small, no per-instance dict
+    __slots__ = ('idMeal', 'strMeal', 'strMealThumb', 'strInstructions', 'strYoutube', 'strCategory', 'strArea', 'pairs')
+
+    def __init__(self, meal) :
+        self.idMeal = meal.get('idMeal')
+        self.strMeal = meal.get('strMeal')
+        self.strMealThumb = meal.get('strMealThumb')
+        self.strInstructions = meal.get('strInstructions')
+        self.strYoutube = meal.get('strYoutube')
+
+        # Interned so every record shares one copy of each category and area
+        self.strCategory = sys.intern(meal['strCategory']) if meal.get('strCategory') else None
+        self.strArea = sys.intern(meal['strArea']) if meal.get('strArea') else None
+
+        # Filter routes carry no ingredients, skip probing the 40 slots entirely
+        self.pairs = self.parsePairs(meal) if 'strIngredient1' in meal else ()
+
+    # (ingredient, measure) pairs with the ingredient names interned
+    @staticmethod
+    def parsePairs(meal) :
+        pairs = []
+
+        for index in range(1, 21) :
+            ingredient = meal.get(f'strIngredient{index}')
+            if ingredient and ingredient.strip() : pairs.append((sys.intern(ingredient), meal.get(f'strMeasure{index}')))
+
+        return tuple(pairs)
+
+    @staticmethod
+    def truncate(text, maxChars = 40) :
+        if not text : return ""
+        return text if len(text) <= maxChars else text[:maxChars - 3] + "..."
+
+    # ---------------- Derived fields, computed on demand ---------------- #
+
+    @property
+    def strMealShort(self) :
+        return self.truncate(self.strMeal)
+
+    @property
+    def previewThumb(self) :
+        return f'{self.strMealThumb}/preview' if self.strMealThumb else None
+
+    @property
+    def ingredients(self) :
+        return [f'{ingredient} - {measure}' for ingredient, measure in self.pairs]
+
+    # Dict-style access for code written against the old meal dicts
+    def __getitem__(self, key) :
+        try :
+            return getattr(self, key)
+        except AttributeError :
+            raise KeyError(key) from None
+
+    def get(self, key, default = None) :
+        return getattr(self, key, default)
+
+    def __repr__(self) :
+        return f'Meal({self.idMeal!r}, {self.strMeal!r})'
+
+    # Plain dict for JSON output, empty fields left out
+    def asDict(self) :
+        data = {name : getattr(self, name) for name in self.__slots__ if name != 'pairs' and getattr(self, name)}
+        if self.pairs : data['ingredients'] = [{'ingredient' : ingredient, 'measure' : measure} for ingredient, measure in self.pairs]
+        return data
+
 # -------------------------------- CORE API -------------------------------- #
 
 class MealAPI :
-    def __init__(self) :
-        self.url = 'https://www.themealdb.com/api/json/v1/1'
+    def __init__(self, url = defaultUrl, transport = None, cache = None, images = None, scheduler = None, catalog = None, names = None, lists = None, source = 'hybrid') :
+        self.url = url
+        # 'remote' : always the API, 'local' : only the offline catalog
+        # 'hybrid' : the catalog first, the API when the catalog has no answer
+        self.source = source
+        # Everything learned from this url is kept apart from other urls, images are keyed by their own url
+        folder = cacheFolderFor(url)
+        self.catalog = catalog or MealCatalog(os.path.join(folder, 'catalog.sqlite3'))
+        # Shared pooled transport for API and image requests
+        self.transport = transport or MealTransport()
+        # Persistent response cache, repeat searches skip the network
+        self.cache = cache or ResponseCache(os.path.join(folder, 'responses.sqlite3'))
+        # Option lists served stale while they revalidate in the background
+        self.lists = lists or OptionLists(os.path.join(folder, 'lists.sqlite3'))
+        # Two tier thumbnail cache shared by cards and recipe popups
+        self.images = images or ImageCache()
+        # Fixed size worker pool for image downloads
+        self.scheduler = scheduler or FetchScheduler()
+        # Identical requests and image loads in progress share one network call
+        self.flights = SingleFlight()
+        # Fuzzy local name index, fed by every search result
+        self.names = names or NameIndex(os.path.join(folder, 'names.sqlite3'))
+        if self.catalog.ready() : self.names.add(self.catalog.meals.values())
+
+        # Bounded cache of full recipes, filled on click or speculatively on hover
+        self.details = DetailCache(self.lookupMeal)
+
+        # Local autocomplete indexes for the list modes, built once per mode
+        self.optionIndexes = {}
+        self.optionLock = threading.Lock()
+        # Mode → time its list was last checked for staleness, at most once per listCheckSeconds
+        self.listChecks = {}
+        self.listCheckSeconds = 60
+
+        # (mode, value) → {ID : card fields} for compound queries, least recently used first
+        self.filterSets = OrderedDict()
+        self.filterSetSize = 64
+        self.filterLock = threading.Lock()
+
+        # Component stats included in every instrumentation snapshot
+        instruments.watch('responseCache', self.cache.info)
+        instruments.watch('imageCache', self.images.info)
+        instruments.watch('scheduler', self.scheduler.info)
+        instruments.watch('details', self.details.info)
+        instruments.watch('names', self.names.info)
+        instruments.watch('singleFlight', self.flights.info)
+        instruments.watch('optionLists', self.lists.info)
+        instruments.watch('traffic', self.transport.traffic.info)
 
         print(
 f'''
@@ -59,8 +1627,21 @@ URL: {self.url}
 '''
         )
 
-    # Raw API request
+    # Raw API request, answered from the offline catalog when the source allows it
     def request(self, mode, prompt) :
+        with instruments.span('api.request') :
+            return self.requestFrom(mode, prompt)
+
+    def requestFrom(self, mode, prompt) :
+        if self.source != 'remote' and self.catalog.ready() :
+            data = self.catalog.query(mode, prompt)
+            if self.source == 'local' or data['meals'] : return data
+
+        if self.source == 'local' : return None
+        return self.requestRemote(mode, prompt)
+
+    # Request against TheMealDB through the response cache, fresh skips cached answers
+    def requestRemote(self, mode, prompt, fresh = False) :
         routes = {
             'id' : 'lookup.php?i',
             'name' : 'search.php?s',
@@ -69,9 +1650,22 @@ URL: {self.url}
             'area' : 'filter.php?a'
         }
 
+        cached = None if fresh else self.cache.get(mode, prompt)
+        if cached is not None : return cached
+
+        # Autocomplete and the search button often ask for the same text at once
+        return self.flights.do('request', (mode, prompt), lambda : self.fetchRemote(routes[mode], mode, prompt))
+
+    def fetchRemote(self, route, mode, prompt) :
         try :
-            response = requests.get(f'{self.url}/{routes[mode]}={prompt}')
-            if response.status_code == 200 : return response.json()
+            response = self.transport.get(f'{self.url}/{route}={prompt}')
+
+            if response.status_code == 200 :
+                with instruments.span('api.json') : data = response.json()
+                self.cache.put(mode, prompt, data)
+                return data
+        except UpstreamUnavailable :
+            pass # Failing fast, already counted by the traffic controller
         except Exception as exception :
             print('API error:', exception)
 
@@ -81,535 +1675,685 @@ URL: {self.url}
         data = self.request(mode, prompt)
 
         if not (data and data.get('meals')) : return []
+
+        # Every result teaches the name index, later name suggestions stay local
+        self.names.add(data['meals'])
         return data['meals']
     
     def truncate(self, text, maxChars = 40):
-        if not text : return ""
-        return text if len(text) <= maxChars else text[:maxChars - 3] + "..."
+        return Meal.truncate(text, maxChars)
 
+    # Builds compact Meal records with only the fields the UI needs
     def processMeals(self, meals) :
-        processed = []
-
-        for meal in meals :
-            # Build a clean meal object with only the fields the UI needs
-            cleanMeal = {
-                'idMeal' : meal.get('idMeal'),
-                'strMeal' : meal.get('strMeal'),
-                'strMealShort': self.truncate(meal.get('strMeal')),
-                'strMealThumb' : meal.get('strMealThumb'),
-                'previewThumb' : f'{meal.get('strMealThumb')}/preview' if meal.get('strMealThumb') else None,
-                'strInstructions' : meal.get('strInstructions'),
-                'strYoutube' : meal.get('strYoutube'),
-                'ingredients' : []
-            }
-
-            # Extract ingredients
-            for index in range(1, 21) :
-                ingredient = meal.get(f'strIngredient{index}')
-                measure = meal.get(f'strMeasure{index}')
-
-                if ingredient and ingredient.strip() : cleanMeal['ingredients'].append(f'{ingredient} - {measure}')
-
-            processed.append(cleanMeal)
+        with instruments.span('api.processMeals') :
+            return [Meal(meal) for meal in meals]
 
-        return processed
+    # Meal records for one search, multi mode takes "seafood + italian + garlic"
+    def searchRecords(self, mode, prompt) :
+        if mode == 'multi' : return self.compoundSearch(self.parseFilters(prompt))
+        return self.processMeals(self.searchMeals(mode, prompt))
 
     def listOptions(self, mode) :
-        routes = {
-            'category': 'list.php?c=list',
-            'ingredient': 'list.php?i=list',
-            'area': 'list.php?a=list'
-        }
-
-        if mode not in routes:
+        if mode not in ['category', 'ingredient', 'area'] :
             print(f'Invalid list mode: {mode}')
             return []
 
-        try :
-            response = requests.get(f'{self.url}/{routes[mode]}')
+        data = None
 
-            if response.status_code == 200 :
-                data = response.json()
+        if self.source != 'remote' and self.catalog.ready() : data = self.catalog.listOptions(mode)
+        if not data and self.source != 'local' : data = self.listRemote(mode)
 
-                # All three endpoints return a list under "meals"
-                items = data.get('meals', [])
+        if data :
+            # All three endpoints return a list under "meals"
+            items = data.get('meals') or []
 
-                # Normalize output to a simple list of strings
-                if mode == 'category' : return [item['strCategory'] for item in items]
-                if mode == 'ingredient' : return [item['strIngredient'] for item in items]
-                if mode == 'area' : return [item['strArea'] for item in items]
-        except Exception as exception :
-            print('API error:', exception)
+            # Normalize output to a simple list of strings
+            if mode == 'category' : return [item['strCategory'] for item in items]
+            if mode == 'ingredient' : return [item['strIngredient'] for item in items]
+            if mode == 'area' : return [item['strArea'] for item in items]
 
         return []
 
-# -------------------------------- CARD UI -------------------------------- #
-
-class CardUI(ctk.CTkFrame) :
-    def __init__(self, parent, mealData, placeHolder, api : MealAPI) :
-        super().__init__(parent, fg_color = foreGroundCol, width = 300, height = 400, cursor = "hand2")
-        self.pack_propagate(False)
-
-        self.api = api
-        self.mealData = mealData
-
-        # Image label
-        self.imgLabel = ctk.CTkLabel(self, image = placeHolder, text = '', cursor = "hand2")
-        self.imgLabel.pack()
-
-        # ID label
-        ctk.CTkLabel(
-            self,
-            text = f'Meal ID: {mealData['idMeal']}',
-            font = fontSmall,
-            wraplength = 300
-        ).pack()
-
-        # Title
-        ctk.CTkLabel(
-            self,
-            text = mealData['strMealShort'],
-            font = fontBig,
-            wraplength = 300
-        ).pack()
-
-        # Bind click to open recipe popup
-        self.bind('<Button-1>', lambda event : self.openFullRecipe())
-        self.imgLabel.bind('<Button-1>', lambda event : self.openFullRecipe())
-
-        mealThumbUrl = mealData.get('previewThumb')
-
-        if mealThumbUrl :
-            threading.Thread(
-                target = lambda : self.loadImageAsync(mealThumbUrl),
-                daemon = True
-            ).start()
-    
-    def openFullRecipe(self) :
-        # Fetch full recipe details
-        full = self.api.searchMeals('id', self.mealData['idMeal'])
-        full = self.api.processMeals(full)
+    # Raw list.php response, the last known one straight away with a background refresh when it is old
+    # fresh revalidates before returning, only the very first load of a list waits on the network
+    def listRemote(self, mode, fresh = False) :
+        data = None if fresh else self.lists.get(mode)
 
-        if full : RecipeUI(full[0])
+        if data is not None :
+            if self.lists.needsRefresh(mode) : self.refreshListLater(mode)
+            return data
 
-    # Replaces placeholder image with the actual image as it loads in the background
-    def loadImageAsync(self, url) :
         try :
-            response = requests.get(url)
-            imgPIL = Image.open(BytesIO(response.content))
-            imgTK = ctk.CTkImage(imgPIL, size = imageSmall)
-
-            # Update image
-            self.imgLabel.configure(image = imgTK)
+            if fresh : return self.revalidateList(mode)
+            return self.flights.do('list', mode, lambda : self.fetchList(mode))
+        except UpstreamUnavailable :
+            pass # Failing fast, already counted by the traffic controller
         except Exception as exception :
-            print('Failed to load image:', url, exception)
+            print('API error:', exception)
 
-# -------------------------------- CARD GRID UI -------------------------------- #
+        return None
 
-class MainUI(ctk.CTkScrollableFrame) :
-    def __init__(self, parent, maxColumns = 4, indexOffset = 0) :
-        super().__init__(parent, fg_color = "transparent")
+    def refreshListLater(self, mode) :
+        # Lowest priority and kept across searches, a newer refresh of the same list replaces a queued one
+        self.scheduler.submit(lambda : self.background(lambda : self.revalidateList(mode)), lambda data : None, 2000, cancellable = False, key = ('list', mode))
 
-        self.maxColumns = maxColumns
-        self.indexOffset = indexOffset
-        self.cards = []
+    # Revalidates a list now, the index built from it is dropped only when its content changed
+    # Never called with optionLock held, optionIndex() loads lists under it
+    def revalidateList(self, mode) :
+        before = self.lists.digest(mode)
+        data = self.flights.do('list', mode, lambda : self.fetchList(mode))
 
-        # Loading/Recipe label
-        self.loadLabel = ctk.CTkLabel(
-            self,
-            text = 'Start Searching a Recipe',
-            font = fontBig
-        )
-        
-        self.loadLabel.grid(row = 0, column = 0, columnspan = maxColumns, padx = smallPadding, pady = smallPadding)
+        if self.lists.digest(mode) != before :
+            with self.optionLock : self.optionIndexes.pop(mode, None)
 
-        # Configure responsive columns
-        for col in range(maxColumns) :
-            self.grid_columnconfigure(col, weight = 1)
+        return data
 
-    # Clears all cards
-    def clear(self) :
-        for card in self.cards : card.destroy()
-        self.cards.clear()
+    # Conditional request when the list is already known
+    def fetchList(self, mode) :
+        routes = {
+            'category': 'list.php?c=list',
+            'ingredient': 'list.php?i=list',
+            'area': 'list.php?a=list'
+        }
 
-    # Adds a CardUI widget and places it in the grid
-    def addCard(self, card) :
-        index = len(self.cards) + self.indexOffset
-        row = (index // self.maxColumns) + 1 # +1 because row 0 is the label
-        col = index % self.maxColumns
+        response = self.transport.get(f'{self.url}/{routes[mode]}', 'list', self.lists.validators(mode))
+        if response.status_code == 304 : return self.lists.notModified(mode)
+        if response.status_code != 200 : return None
 
-        card.grid(row = row, column = col, padx = smallPadding, pady = smallPadding)
-        self.cards.append(card)
+        with instruments.span('api.json') : data = response.json()
+        self.lists.put(mode, data, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return data
 
-# -------------------------------- RECIPE UI -------------------------------- #
+    # One full processed recipe by ID, or None
+    def lookupMeal(self, mealId) :
+        meals = self.processMeals(self.searchMeals('id', mealId))
+        return meals[0] if meals else None
 
-class RecipeUI(ctk.CTkToplevel) :
-    def __init__(self, meal) :
-        super().__init__(fg_color = backGroundCol)
-
-        self.title(meal['strMeal'])
-        self.geometry('1100x800')
-
-        # Focuses all the input into this window
-        self.grab_set()
-
-        # Configure layout (two-column layout)
-        self.grid_rowconfigure(0, weight = 1)
-        self.grid_columnconfigure(0, weight = 1)
-        self.grid_columnconfigure(1, weight = 1)
-
-        # ---------------- MAIN FRAME (Left) ---------------- #
-
-        mainFrame = ctk.CTkScrollableFrame(self, fg_color = foreGroundCol)
-        mainFrame.grid(row = 0, column = 0, sticky = 'nsew', padx = bigPadding, pady = bigPadding)
-        mainFrame.grid_columnconfigure(0, weight = 1)
-
-        # Placeholder image
-        self.tempImg = ctk.CTkImage(Image.new('RGB', imageBig, 'gray'), size = imageBig)
-
-        # ID
-        ctk.CTkLabel(
-            mainFrame,
-            text = f'Meal ID: {meal['idMeal']}',
-            font = fontMedium,
-            wraplength = 400
-        ).grid(row = 0, column = 0, pady = smallPadding)
-
-        # Meal Name
-        ctk.CTkLabel(
-            mainFrame,
-            text = meal['strMeal'],
-            font = fontBig,
-            wraplength = 400
-        ).grid(row = 1, column = 0, pady = smallPadding)
-
-        # Image placeholder
-        self.imgLabel = ctk.CTkLabel(mainFrame, image = self.tempImg, text = '')
-        self.imgLabel.grid(row = 2, column = 0, pady = smallPadding)
-
-        # Load image asynchronously
-        if meal.get('strMealThumb') :
-            threading.Thread(
-                target = lambda : self.loadImageAsync(meal['strMealThumb']),
-                daemon = True
-            ).start()
-
-        # Ingredients (Looped)
-        ingredients = meal.get('ingredients', [])
-
-        if ingredients :
-            ctk.CTkLabel(
-                mainFrame,
-                text = 'Ingredients',
-                font = fontMedium
-            ).grid(row = 3, column = 0, pady = smallPadding)
-
-            for index, item in enumerate(ingredients) :
-                ctk.CTkLabel(
-                    mainFrame,
-                    text = item,
-                    font = fontSmall,
-                    anchor = 'w',
-                    justify = 'left'
-                ).grid(row = 4 + index, column = 0, sticky = 'w', padx = smallPadding)
-
-        # ---------------- INSTRUCTIONS FRAME (Right) ---------------- #
-
-        instructionFrame = ctk.CTkScrollableFrame(self, fg_color = foreGroundCol)
-        instructionFrame.grid(row = 0, column = 1, sticky = 'nswe', padx = bigPadding, pady = bigPadding)
-
-        ctk.CTkLabel(
-            instructionFrame,
-            text = 'Instructions',
-            font = fontMedium
-        ).grid(row = 0, column = 0, pady = smallPadding)
-
-        self.instructions_label = ctk.CTkLabel(
-            instructionFrame,
-            text = meal.get('strInstructions', 'No instructions available.'),
-            font = fontSmall,
-            wraplength = 500,
-            justify = 'left'
-        )
+    # Loads full recipe details in the background so a later click opens instantly
+    def prefetchDetails(self, mealId) :
+        # Keyed by ID, hovering the same card again replaces its queued job instead of adding another
+        self.details.prefetch(mealId, lambda work : self.scheduler.submit(lambda : self.background(work), lambda meal : None, priority = 1000, key = ('details', mealId)))
 
-        self.instructions_label.grid(row = 1, column = 0, pady = smallPadding, sticky = 'nw')
-
-        # YouTube Button, display if link is available
-        if meal.get('strYoutube') :
-            ctk.CTkButton(
-                self,
-                text = 'Watch YouTube Tutorial',
-                font = fontMedium,
-                fg_color = accentCol,
-                hover_color = accentCol,
-                command = lambda : webbrowser.open(meal['strYoutube'])
-            ).grid(row = 1, column = 0, padx = bigPadding, pady = bigPadding)
-
-        # Close Button
-        ctk.CTkButton(
-            self,
-            text = 'Close Popup Window',
-            font = fontMedium,
-            fg_color = accentCol,
-            hover_color = accentCol,
-            command = self.destroy
-        ).grid(row = 1, column = 1, padx = bigPadding, pady = bigPadding)
-
-    # ---------------- Async loaders ---------------- #
-
-    def loadImageAsync(self, url) :
-        try :
-            response = requests.get(url)
+    # Runs function with its requests counted as background traffic, never ahead of a search
+    def background(self, function) :
+        with self.transport.traffic.background() :
+            return function()
 
-            imgPIL = Image.open(BytesIO(response.content))
-            imgTK = ctk.CTkImage(imgPIL, size = imageBig)
+    # False while TheMealDB is failing and requests fail fast
+    def available(self) :
+        return self.transport.traffic.available()
 
-            self.imgLabel.configure(image = imgTK, text = '')
-        except Exception as exception :
-            print('Failed to load recipe image :', exception)
+    # ---------------- Batch lookups ---------------- #
 
-# -------------------------------- HEADER UI -------------------------------- #
+    # Runs function over items on a bounded thread pool, yields results as they complete
+    def mapConcurrent(self, function, items, concurrency = 8) :
+        pool = ThreadPoolExecutor(max_workers = concurrency)
 
-class HeaderUI(ctk.CTkFrame) :
-    def __init__(self, parent, getSuggestions, runSearch) :
-        super().__init__(parent, fg_color = "transparent")
+        try :
+            futures = [pool.submit(function, item) for item in items]
+            for future in as_completed(futures) : yield future.result()
+        finally :
+            # Stopping early drops the lookups that have not started yet
+            pool.shutdown(wait = False, cancel_futures = True)
 
-        self.fullSuggestions = []
-        self.runSearch = runSearch
-        self.getSuggestions = getSuggestions
+    # Full processed recipes for many IDs, duplicates fetched once, yielded in completion order
+    def lookupMany(self, ids, concurrency = 8) :
+        unique = list(dict.fromkeys(str(mealId).strip() for mealId in ids))
 
-        self.grid_columnconfigure(0, weight = 1)
+        for meals in self.mapConcurrent(lambda mealId : self.searchMeals('id', mealId), unique, concurrency) :
+            yield from self.processMeals(meals)
 
-        # Track last typed text to avoid race conditions
-        self.lastQuery = ""
+    # ---------------- Offline catalog ---------------- #
 
-        # ---------------- TITLE ---------------- #
+    # Mirrors the whole catalog locally through the list and filter endpoints
+    # Only IDs missing from the catalog are looked up unless full is set
+    def harvest(self, full = False) :
+        ids = set()
 
-        ctk.CTkLabel(
-            self,
-            text = applicationName,
-            font = fontBig
-        ).grid(row = 0, column = 0, padx = bigPadding, pady = bigPadding, sticky = 'nsw')
+        # Every meal has a category and an area, walking both catches any gaps in either
+        for mode in ['category', 'area'] :
+            data = self.listRemote(mode, fresh = True) or {}
+            key = 'strCategory' if mode == 'category' else 'strArea'
 
-        # Mode menu
-        self.modeMenu = ctk.CTkOptionMenu(
-            self,
-            values = ['Name', 'Category', 'Ingredient', 'Area', 'ID'],
-            font = fontMedium,
-            dropdown_font = fontMedium,
-            fg_color = accentCol,
-            button_color = accentCol,
-            button_hover_color = accentCol
-        )
+            for item in data.get('meals') or [] :
+                found = self.requestRemote(mode, item[key], fresh = True) or {}
+                ids.update(meal['idMeal'] for meal in found.get('meals') or [])
 
-        self.modeMenu.grid(row = 0, column = 2, padx = bigPadding, pady = bigPadding, sticky = 'nse')
-        self.modeMenu.configure(command = lambda e : self.refreshAutocomplete())
+        missing = sorted(ids if full else ids - self.catalog.ids())
+        meals = []
 
-        # Search button
-        self.searchButton = ctk.CTkButton(
-            self,
-            text = '🔍',
-            font = fontBig,
-            fg_color = accentCol,
-            hover_color = accentCol
-        )
+        for found in self.mapConcurrent(lambda mealId : self.requestRemote('id', mealId), missing) :
+            meals += (found or {}).get('meals') or []
 
-        self.searchButton.grid(row = 0, column = 3, padx = bigPadding, pady = bigPadding, sticky = 'nse')
+        self.catalog.store(meals)
 
-        # Search bar
-        self.searchBar = ctk.CTkEntry(
-            self,
-            placeholder_text = 'Search...',
-            font = fontMedium,
-            fg_color = foreGroundCol
-        )
+        # Option indexes may now be answered locally
+        with self.optionLock : self.optionIndexes.clear()
 
-        self.searchBar.grid(row = 0, column = 4, ipadx = bigPadding * 8, padx = bigPadding, pady = bigPadding, sticky = 'nswe')
+        return {'listed' : len(ids), 'fetched' : len(meals)} | self.catalog.info()
 
-        # Bind typing event
-        self.searchBar.bind('<KeyRelease>', lambda e : self.refreshAutocomplete())
+    # Index over a list mode's options, loaded on first use
+    def optionIndex(self, mode) :
+        with self.optionLock :
+            if mode not in self.optionIndexes :
+                options = self.listOptions(mode)
 
-        # ---------------- AUTOCOMPLETE FRAME ---------------- #
+                # Do not keep an empty index around after a failed request
+                if not options : return OptionIndex([])
+                self.optionIndexes[mode] = OptionIndex(options)
 
-        self.autoFrame = ctk.CTkFrame(self, fg_color = foreGroundCol)
-        self.autoFrame.grid(row = 1, column = 0, columnspan = 5, sticky = 'nwe', padx = bigPadding)
-        self.autoFrame.grid_columnconfigure((0, 1, 2, 3), weight = 1)
-        self.autoFrame.grid_remove() # Hidden at startup
+            index = self.optionIndexes[mode]
 
-        # Suggested label
-        self.suggestLabel = ctk.CTkLabel(
-            self.autoFrame,
-            text = 'Suggested',
-            font = fontBig
-        )
+        # Outside optionLock, a changed list drops the index under it
+        self.checkList(mode)
+        return index
 
-        self.suggestLabel.grid(row = 0, column = 0, columnspan = 4, pady = (smallPadding, 0))
+    # Lists that go stale during a session are revalidated in the background, not only at startup
+    def checkList(self, mode) :
+        if self.source == 'local' : return
 
-        # Display 4 suggestion buttons, store them for later
-        self.autoButtons = []
+        now = time.monotonic()
+        if now - self.listChecks.get(mode, -self.listCheckSeconds) < self.listCheckSeconds : return
+        self.listChecks[mode] = now
 
-        for index in range(4) :
-            btn = ctk.CTkButton(
-                self.autoFrame,
-                text = '',
-                font = fontMedium,
-                fg_color = accentCol,
-                hover_color = accentCol,
-                command = lambda i = index : self.selectSuggestion(i)
-            )
+        if self.lists.isDue(mode) : self.refreshListLater(mode)
 
-            btn.grid(row = 1, column = index, padx = bigPadding, pady = bigPadding, sticky = 'we')
-            self.autoButtons.append(btn)
+    # Loads every list and builds its index, run off the main thread at startup
+    def preloadOptions(self) :
+        with self.transport.traffic.background() :
+            for mode in ['category', 'area', 'ingredient'] : self.optionIndex(mode)
 
-    def modeGet(self) :
-        return self.modeMenu.get().lower()
+    # Rebuilds the index for a list mode from a fresh list
+    def refreshOptions(self, mode) :
+        with self.optionLock :
+            self.optionIndexes.pop(mode, None)
 
-    def searchGet(self) :
-        return self.searchBar.get().lower().strip()
+        return self.optionIndex(mode)
 
-    # ---------------- AUTOCOMPLETE LOGIC ---------------- #
-    
-    def refreshAutocomplete(self):
-        mode = self.modeGet()
-        text = self.searchGet()
+    # Top matching options for autocomplete, prefix matches first
+    def suggestOptions(self, mode, text, limit = 4) :
+        return self.optionIndex(mode).search(text, limit)
 
-        # Update last query
-        self.lastQuery = text
+    # Ranked, typo tolerant name matches from meals seen before, empty on a miss
+    def suggestNames(self, text, limit = 4) :
+        with instruments.span('api.suggestNames') :
+            return self.names.search(text, limit)
 
-        # Hide and exit early if the text is less than 2 characters
-        if len(self.lastQuery) < 2 :
-            self.autoFrame.grid_remove()
-            return
+    # ---------------- Compound queries ---------------- #
 
-        threading.Thread(
-            target = lambda: self.fetchSuggestions(text, mode),
-            daemon = True
-        ).start()
+    # Mode for one term : "area:italian" names it, otherwise the first list holding it exactly, otherwise a name search
+    def resolveFilter(self, term) :
+        mode, separator, value = term.partition(':')
+        mode = mode.strip().lower()
+        if separator and mode in ['name', 'category', 'ingredient', 'area'] : return mode, value.strip()
 
-    def fetchSuggestions(self, text, mode) :
-        # Ignore outdated threads
-        if text != self.lastQuery : return
+        for mode in ['category', 'area', 'ingredient'] :
+            if self.optionIndex(mode).find(term) is not None : return mode, term.strip()
 
-        # Ask the injected function for suggestions
-        suggestions = self.getSuggestions(text, mode)
+        return 'name', term.strip()
 
-        # Push UI update to main thread
-        self.after(0, lambda : self.showSuggestions(suggestions))
+    # "Seafood + Italian + garlic" → [('category', 'Seafood'), ('area', 'Italian'), ('ingredient', 'garlic')]
+    def parseFilters(self, text) :
+        return [self.resolveFilter(term) for term in text.split('+') if term.strip()]
 
-    def showSuggestions(self, suggestions) :
-        self.fullSuggestions = suggestions
+    # IDs matching one filter with their card fields, fetched once and kept for later queries
+    def filterSet(self, mode, value) :
+        key = (mode, value.lower())
 
-        # Ignore empty suggestions
-        if not suggestions :
-            self.autoFrame.grid_remove()
-            return
+        with self.filterLock :
+            if key in self.filterSets :
+                self.filterSets.move_to_end(key)
+                return self.filterSets[key]
 
-        self.autoFrame.grid()
+        # Goes through the catalog and response cache like a single search
+        data = self.request(mode, value)
+        found = (data or {}).get('meals') or []
+        if found : self.names.add(found)
 
-        for index, btn in enumerate(self.autoButtons) :
-            if index < len(suggestions) :
-                options = suggestions[index]
-                # CASE 2 : Category / Ingredient / Area → item is a string
-                buttonText = options
-                # CASE 1 : Name mode → item is a meal object
-                if isinstance(options, dict) : buttonText = options['strMealShort']
+        meals = {meal['idMeal'] : meal for meal in found}
 
-                btn.configure(text = buttonText)
-                btn.grid()
-            else :
-                btn.grid_remove()
+        # A failed request is not the same as no matches, only answers are kept
+        if data is None : return meals
 
-    def selectSuggestion(self, index) :
-        options = self.fullSuggestions[index]
+        with self.filterLock :
+            self.filterSets[key] = meals
+            if len(self.filterSets) > self.filterSetSize : self.filterSets.popitem(last = False)
 
-        # CASE 2 : Category / Ingredient / Area → item is a string
-        buttonText = options
-        # CASE 1 : Name mode → item is a meal object
-        if isinstance(options, dict) : buttonText = options['strMeal']
+        return meals
 
-        self.searchBar.delete(0, 'end')
-        self.searchBar.insert(0, buttonText)
-        self.autoFrame.grid_remove()
+    # Meals matching every filter, sets are fetched concurrently and intersected smallest first
+    # Only card fields from the filter responses are used, full recipes still load on hover or click
+    def compoundSearch(self, filters, concurrency = 4) :
+        filters = list(dict.fromkeys((mode, value) for mode, value in filters if value))
+        if not filters : return []
 
-        self.runSearch(buttonText, self.modeGet())
+        with instruments.span('api.compoundSearch') :
+            sets = sorted(self.mapConcurrent(lambda item : self.filterSet(*item), filters, concurrency), key = len)
+            ids = list(sets[0])
 
-# -------------------------------- MAIN APPLICATION -------------------------------- #
+            for other in sets[1:] :
+                if not ids : break
+                ids = [mealId for mealId in ids if mealId in other]
 
-class Application(ctk.CTk) :
-    def __init__(self) :
-        super().__init__(fg_color = backGroundCol)
+            return self.processMeals([sets[0][mealId] for mealId in ids])
 
-        self.geometry('360x360')
-        self.after(0, self.wm_state, 'zoomed')
-        self.title(f'{applicationName} v{applicationVersion}')
+    # Options from every list mode for the term being typed, prefix matches first
+    def suggestFilters(self, text, limit = 4) :
+        text = text.lower().strip()
+        options = []
 
-        # Grid config to adapt to layout
-        self.grid_rowconfigure(0, weight = 0)
-        self.grid_rowconfigure(1, weight = 1)
-        self.grid_columnconfigure(0, weight = 1)
+        for mode in ['category', 'area', 'ingredient'] :
+            options += self.suggestOptions(mode, text, limit)
+
+        options = list(dict.fromkeys(options))
+        options.sort(key = lambda option : (option.lower().find(text), len(option), option.lower()))
+        return options[:limit]
+
+    # Downloads raw image bytes through the shared pool
+    def fetchImage(self, url) :
+        return self.flights.do('download', url, lambda : self.transport.getBytes(url))
+
+    # Decoded image at the given size, served from the image cache when possible
+    # Cards sharing a thumbnail wait for one download and decode
+    def loadImage(self, url, size) :
+        with instruments.span('api.loadImage') :
+            return self.flights.do('image', (url, size), lambda : self.images.load(url, size, self.fetchImage))
+
+# -------------------------------- RENDER SCHEDULER -------------------------------- #
 
-        self.api = MealAPI()
+class RenderScheduler :
+    def __init__(self, widget, budgetMs = 8, frameMs = 16, stallMs = 50) :
+        self.widget = widget # Any widget, used for after()
+        self.budget = budgetMs / 1000 # Time allowed for rendering in one frame
+        self.frameMs = frameMs
+        self.stall = stallMs / 1000 # A frame arriving this late means the event loop was blocked
+
+        # Filled a page at a time by extend(), drained on the main thread within the frame budget
+        self.items = deque()
+        self.finished = False
+        self.render = None
+        self.done = None
+
+        self.generation = 0
+        self.afterId = None
+        self.started = 0.0
+        self.lastFrame = 0.0
 
-        # Header Widget
-        header = HeaderUI(self, self.getAutocomplete, self.runSearch)
-        header.grid(row = 0, column = 0, sticky = 'nwe')
+        self.stats = {}
+        self.resetStats()
+
+    def resetStats(self) :
+        self.stats = {'frames' : 0, 'rendered' : 0, 'overBudget' : 0, 'stalls' : 0, 'maxFrameMs' : 0.0, 'maxGapMs' : 0.0, 'firstRenderMs' : None}
+
+    # Main thread : starts a new stream, anything from the previous one is dropped
+    def start(self, render, done = None) :
+        self.cancel()
+
+        self.generation += 1
+        self.render = render
+        self.done = done
+        self.finished = False
+        self.started = self.lastFrame = time.perf_counter()
+        self.resetStats()
+
+        self.afterId = self.widget.after(0, self.pump)
+        return self.generation
+
+    # Main thread : stops the current stream
+    def cancel(self) :
+        if self.afterId : self.widget.after_cancel(self.afterId)
+        self.afterId = None
+        self.items.clear()
+        self.finished = True
+
+    # Main thread : adds items to a stream that may have finished, e.g. the next page of results
+    # Stale generations are ignored
+    def extend(self, generation, items) :
+        if generation != self.generation : return
+
+        self.items.extend(items)
+
+        # Restart a pump that went idle, the wait for the user is not a stalled frame
+        if self.afterId is None :
+            self.lastFrame = time.perf_counter()
+            self.afterId = self.widget.after(0, self.pump)
+
+    # Any thread : no more items will come for this generation
+    def finish(self, generation) :
+        if generation == self.generation : self.finished = True
+
+    def pump(self) :
+        self.afterId = None
+        now = time.perf_counter()
+
+        gap = now - self.lastFrame
+        self.stats['maxGapMs'] = max(self.stats['maxGapMs'], round(gap * 1000, 2))
+        if gap > self.stall : self.stats['stalls'] += 1
+
+        # Render until the frame budget runs out, the rest waits for the next frame
+        generation = self.generation
+        rendered = 0
+
+        while self.items and time.perf_counter() - now < self.budget :
+            self.render(self.items.popleft())
+            rendered += 1
+
+            # render may have started a new search
+            if generation != self.generation : return
+
+        spent = time.perf_counter() - now
+        self.stats['frames'] += 1
+        self.stats['rendered'] += rendered
+        self.stats['maxFrameMs'] = max(self.stats['maxFrameMs'], round(spent * 1000, 2))
+        if spent > self.budget * 2 : self.stats['overBudget'] += 1
+        if rendered and self.stats['firstRenderMs'] is None : self.stats['firstRenderMs'] = round((now - self.started) * 1000, 2)
+
+        self.lastFrame = time.perf_counter()
+
+        if self.items or not self.finished :
+            self.afterId = self.widget.after(self.frameMs, self.pump)
+        elif self.done :
+            self.done()
+
+    # Frame stats for the current stream
+    def info(self) :
+        return self.stats | {'generation' : self.generation, 'queued' : len(self.items), 'finished' : self.finished}
+
+# -------------------------------- UI UPDATE QUEUE -------------------------------- #
+
+# Widget updates posted by worker threads, applied on the main thread in batches once per frame
+# Workers never call into Tk, a newer update for the same widget and slot replaces a waiting one
+class UpdateQueue :
+    def __init__(self, widget, frameMs = 16, budgetMs = 8) :
+        self.widget = widget # Any widget, used for after()
+        self.frameMs = frameMs
+        self.budget = budgetMs / 1000 # Time allowed for applying updates in one frame
+
+        self.lock = threading.Lock()
+        self.updates = OrderedDict() # (target, slot) → function, oldest first
+        self.afterId = None
+
+        self.stats = {'posted' : 0, 'coalesced' : 0, 'applied' : 0, 'dropped' : 0, 'errors' : 0, 'frames' : 0, 'peakDepth' : 0, 'maxApplyMs' : 0.0, 'lastApplyMs' : 0.0}
+
+    # Main thread : starts the periodic pump
+    def start(self) :
+        if self.afterId is None : self.afterId = self.widget.after(self.frameMs, self.pump)
+
+    def stop(self) :
+        if self.afterId : self.widget.after_cancel(self.afterId)
+        self.afterId = None
+
+    # Any thread : function runs on the main thread while target still exists
+    # slot names what it changes, e.g. 'image', so two kinds of update to one widget both apply
+    def post(self, target, slot, function) :
+        with self.lock :
+            self.stats['posted'] += 1
+            if (target, slot) in self.updates : self.stats['coalesced'] += 1
+
+            self.updates[(target, slot)] = function
+            self.stats['peakDepth'] = max(self.stats['peakDepth'], len(self.updates))
+
+    def depth(self) :
+        with self.lock :
+            return len(self.updates)
+
+    def pump(self) :
+        start = time.perf_counter()
+        applied = dropped = 0
+
+        # Apply until the frame budget runs out, the rest waits for the next frame
+        while time.perf_counter() - start < self.budget :
+            with self.lock :
+                if not self.updates : break
+                (target, slot), function = self.updates.popitem(last = False)
+
+            try :
+                # Widget destroyed since the update was posted
+                if not target.winfo_exists() :
+                    dropped += 1
+                    continue
+
+                function()
+                applied += 1
+            except Exception as exception :
+                print('UI update error:', exception)
+                self.stats['errors'] += 1
+
+        spent = round((time.perf_counter() - start) * 1000, 3)
+
+        with self.lock :
+            self.stats['frames'] += 1
+            self.stats['applied'] += applied
+            self.stats['dropped'] += dropped
+            self.stats['lastApplyMs'] = spent
+            self.stats['maxApplyMs'] = max(self.stats['maxApplyMs'], spent)
+
+        self.afterId = self.widget.after(self.frameMs, self.pump)
+
+    # Queue depth and per frame apply time
+    def info(self) :
+        with self.lock :
+            return self.stats | {'depth' : len(self.updates)}
+
+# -------------------------------- SUGGESTION PIPELINE -------------------------------- #
+
+class SuggestionPipeline :
+    def __init__(self, widget, fetch, deliver, debounceMs = 150, completeLimit = 25, cacheSize = 64, local = None) :
+        self.widget = widget # Any widget, the debounce runs on its after() so typing starts no threads
+        self.fetch = fetch # fetch(text, mode, None) → every suggestion for the text
+        self.deliver = deliver # deliver(text, mode, suggestions), from the main thread or a fetch worker
+        self.local = local # local(text, mode) → suggestions from an in-memory index, empty on a miss
+        self.debounceMs = debounceMs
+        # A result shorter than this is taken as the complete set for its text
+        self.completeLimit = completeLimit
+
+        self.lock = threading.Lock()
+        self.afterId = None # Pending debounce, main thread only
+        self.inFlight = {} # Mode → text being fetched
+        self.pending = {} # Mode → newest text waiting for the in-flight request
+        self.completed = OrderedDict() # (mode, text) → complete suggestions, least recently used first
+        self.cacheSize = cacheSize
+
+        self.stats = {'keystrokes' : 0, 'debounced' : 0, 'requests' : 0, 'localHits' : 0, 'indexHits' : 0, 'superseded' : 0}
+
+    # Main thread : every keystroke restarts the debounce window, only the last one gets submitted
+    def keystroke(self, text, mode) :
+        # A local index hit is delivered straight away, no debounce or request
+        suggestions = self.local(text, mode) if self.local else None
+        self.cancel()
+
+        with self.lock :
+            self.stats['keystrokes'] += 1
+            if suggestions : self.stats['indexHits'] += 1
+
+        if suggestions :
+            self.deliver(text, mode, suggestions)
+            return
 
-        header.searchButton.configure(command = lambda : self.runSearch(header.searchGet(), header.modeGet()))
-        header.searchBar.bind('<Return>', lambda event : self.runSearch(header.searchGet(), header.modeGet()))
+        self.afterId = self.widget.after(self.debounceMs, lambda : self.fire(text, mode))
 
-        # Main Widget
-        self.main = MainUI(self, 4, 0)
-        self.main.grid(row = 1, column = 0, sticky = 'nsew')
+    def fire(self, text, mode) :
+        self.afterId = None
+        self.submit(text, mode)
 
-    # ---------------- SEARCH LOGIC ---------------- #
+    # Main thread
+    def cancel(self) :
+        if self.afterId : self.widget.after_cancel(self.afterId)
+        self.afterId = None
 
-    def runSearch(self, prompt, mode) :
-        # Clear grid
-        self.main.clear()
-        # Change to loading while waiting
-        self.main.loadLabel.configure(text = f'Loading "{prompt}" by {mode}…')
+    def matches(self, item, text) :
+        # CASE 1 : Name mode → item is a meal object
+        if isinstance(item, Meal) : return text in (item.strMeal or '').lower()
+        # CASE 2 : Category / Ingredient / Area → item is a string
+        return text in item.lower()
 
-        threading.Thread(
-            target = lambda : self.searchThread(prompt, mode),
-            daemon = True
-        ).start()
+    # Filters a complete result for a shorter prefix instead of asking again
+    def fromCache(self, text, mode) :
+        for length in range(len(text), 1, -1) :
+            key = (mode, text[:length])
+            results = self.completed.get(key)
+            if results is None : continue
 
-    def searchThread(self, prompt, mode) :
-        # Process Raw API prompt
-        raw = self.api.searchMeals(mode, prompt)
-        meals = self.api.processMeals(raw)
+            self.completed.move_to_end(key)
+            return results if length == len(text) else [item for item in results if self.matches(item, text)]
 
-        # Temp image for all the cards as it loads
-        tempImg = ctk.CTkImage(Image.new('RGB', imageSmall, 'gray'), size = imageSmall)
+        return None
 
-        # Update loading label if none found
-        if not meals :
-            self.after(0, lambda: self.main.loadLabel.configure(text = "No results found"))
-            return
+    def remember(self, text, mode, results) :
+        if self.completeLimit is not None and len(results) >= self.completeLimit : return
 
-        # Update loading label if results found
-        self.main.loadLabel.configure(text = f'Recipes for "{prompt}" by {mode}')
+        self.completed[(mode, text)] = results
+        if len(self.completed) > self.cacheSize : self.completed.popitem(last = False)
 
-        # Add in the cards
-        for meal in meals :
-            card = CardUI(self.main, meal, tempImg, self.api)
-            self.main.addCard(card)
+    def submit(self, text, mode) :
+        with self.lock :
+            self.stats['debounced'] += 1
+            local = self.fromCache(text, mode)
 
-    def getAutocomplete(self, text, mode) :
-        if mode in ['category', 'ingredient', 'area'] :
-            # Use the API's list feature
-            options = self.api.listOptions(mode)
-            # Returns only the top 4 results
-            return [item for item in options if text in item.lower()][:4]
+            if local is None :
+                # Only one request per mode at a time, newer text replaces whatever was waiting
+                if mode in self.inFlight :
+                    if mode in self.pending : self.stats['superseded'] += 1
+                    self.pending[mode] = text
+                    return
 
-        if mode == 'name' :
-            # Simply use the API's existing search feature
-            raw = self.api.searchMeals('name', text)
-            meals = self.api.processMeals(raw)
-            # Returns only the top 4 results
-            return meals[:4]
+                self.inFlight[mode] = text
+                self.stats['requests'] += 1
+            else :
+                self.stats['localHits'] += 1
 
-        return []
+        if local is not None :
+            self.deliver(text, mode, local)
+            return
+
+        threading.Thread(target = lambda : self.run(text, mode), daemon = True).start()
+
+    def run(self, text, mode) :
+        try :
+            results = self.fetch(text, mode, None)
+        except Exception as exception :
+            print('Suggestion error:', exception)
+            results = None
+
+        with self.lock :
+            if results is not None : self.remember(text, mode, results)
+            del self.inFlight[mode]
+            nextText = self.pending.pop(mode, None)
+
+        self.deliver(text, mode, results or [])
+        if nextText is not None : self.submit(nextText, mode)
+
+    # Requests per keystroke plus how many were answered locally or superseded
+    def info(self) :
+        with self.lock :
+            keystrokes = self.stats['keystrokes']
+            return self.stats | {'requestsPerKeystroke' : round(self.stats['requests'] / keystrokes, 3) if keystrokes else 0.0}
+
+# -------------------------------- COMMAND LINE -------------------------------- #
+
+def parseArguments(arguments) :
+    # Shared by every command so they can go before or after the command's own arguments
+    common = argparse.ArgumentParser(add_help = False)
+    common.add_argument('--url', default = defaultUrl, help = 'API base url')
+    common.add_argument('--source', choices = ['remote', 'local', 'hybrid'], default = 'hybrid', help = 'where answers come from')
+    common.add_argument('--format', choices = ['json', 'jsonl'], default = 'json', help = 'one JSON document, or one line per result')
+
+    parser = argparse.ArgumentParser(
+        prog = 'pythonApplication.py',
+        description = f'{applicationName} headless client, run without arguments to open the window'
+    )
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    search = commands.add_parser('search', parents = [common], help = 'meals matching a prompt')
+    search.add_argument('prompt')
+    search.add_argument('--mode', choices = ['name', 'category', 'ingredient', 'area', 'multi'], default = 'name', help = 'multi takes "seafood + italian + garlic"')
+    search.add_argument('--limit', type = int)
+
+    lookup = commands.add_parser('lookup', parents = [common], help = 'full recipes by ID')
+    lookup.add_argument('ids', nargs = '+')
+
+    options = commands.add_parser('list', parents = [common], help = 'every category, ingredient or area')
+    options.add_argument('mode', choices = ['category', 'ingredient', 'area'])
+
+    harvest = commands.add_parser('harvest', parents = [common], help = 'mirror the catalog for offline use')
+    harvest.add_argument('--full', action = 'store_true', help = 'look up every meal again')
+
+    return parser.parse_args(arguments)
+
+# JSON lines are written as results arrive, JSON waits for all of them
+def writeResults(results, format, out) :
+    if format == 'jsonl' :
+        for result in results :
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    else :
+        json.dump(list(results), out, indent = 4)
+        out.write('\n')
+
+# Runs one command with only the API layer, exit status 1 when nothing was found
+def runCommand(options) :
+    out = sys.stdout
+    found = [0]
+
+    def counted(results) :
+        for result in results :
+            found[0] += 1
+            yield result
+
+    # The banner and error prints go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr) :
+        api = MealAPI(options.url, source = 'remote' if options.command == 'harvest' else options.source)
+
+        # Harvest reports one summary object
+        if options.command == 'harvest' :
+            summary = api.harvest(full = options.full)
+            out.write(json.dumps(summary, indent = None if options.format == 'jsonl' else 4) + '\n')
+            return 0
+
+        if options.command == 'search' :
+            results = (meal.asDict() for meal in api.searchRecords(options.mode, options.prompt)[:options.limit])
+        elif options.command == 'lookup' :
+            results = (meal.asDict() for meal in api.lookupMany(options.ids))
+        else :
+            results = api.listOptions(options.mode)
+
+        writeResults(counted(results), options.format, out)
+
+    return 0 if found[0] else 1
+
+# -------------------------------- ENTRY POINT -------------------------------- #
+
+# GUI classes, customtkinter and Pillow load on first use, so importing this module stays headless
+interfaceNames = {'CardUI', 'MainUI', 'RecipeUI', 'HeaderUI', 'Application'}
+
+def loadInterface() :
+    # pythonInterface imports this module by name, share it rather than loading a second copy when run as a script
+    sys.modules.setdefault('pythonApplication', sys.modules[__name__])
+
+    import pythonInterface
+    return pythonInterface
+
+def __getattr__(name) :
+    if name in interfaceNames : return getattr(loadInterface(), name)
+
+    if name == 'ctk' :
+        import customtkinter
+        return customtkinter
+
+    if name == 'Image' :
+        from PIL import Image
+        return Image
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+# python pythonApplication.py opens the window
+# python pythonApplication.py search|lookup|list|harvest ... runs headless, see --help
+def main(arguments = None) :
+    arguments = sys.argv[1:] if arguments is None else arguments
+    if arguments : return runCommand(parseArguments(arguments))
+
+    loadInterface().Application().mainloop()
+    return 0
 
-# Run main application
-Application().mainloop()
\ No newline at end of file
+if __name__ == '__main__' :
+    sys.exit(main())
@@ -0,0 +1,935 @@
+# -------------------------------- INTERFACE -------------------------------- #
+
+# customtkinter widgets for MEALY DISPLAYINATOR 3000, imported only when the window opens
+# Run the application with python pythonApplication.py
+
+# -------------------------------- IMPORTS -------------------------------- #
+
+# Imports threading and time for background loads and timings
+import threading
+import time
+
+# Imports the API, records, schedulers and styling
+from pythonApplication import (
+    Meal, MealAPI, RenderScheduler, SuggestionPipeline, UpdateQueue, UpstreamUnavailable, instruments,
+    applicationName, applicationVersion, backGroundCol, foreGroundCol, accentCol,
+    fontBig, fontMedium, fontSmall, bigPadding, smallPadding, imageBig, imageSmall
+)
+
+# To open browser links
+import webbrowser
+
+# Imports pillow for images
+from PIL import Image
+
+# Install customtkinter
+# python -m pip install customtkinter
+import customtkinter as ctk
+
+# -------------------------------- CARD UI -------------------------------- #
+
+class CardUI(ctk.CTkFrame) :
+    # updates : the main thread UpdateQueue, image results from workers go through it
+    def __init__(self, parent, mealData, placeHolder, api : MealAPI, updates : UpdateQueue) :
+        super().__init__(parent, fg_color = foreGroundCol, width = 300, height = 400, cursor = "hand2")
+        self.pack_propagate(False)
+
+        self.api = api
+        self.updates = updates
+        self.mealData = mealData
+        self.placeHolder = placeHolder
+
+        # Image label
+        self.imgLabel = ctk.CTkLabel(self, image = placeHolder, text = '', cursor = "hand2")
+        self.imgLabel.pack()
+
+        # ID label
+        self.idLabel = ctk.CTkLabel(
+            self,
+            text = f'Meal ID: {mealData.idMeal}',
+            font = fontSmall,
+            wraplength = 300
+        )
+
+        self.idLabel.pack()
+
+        # Title
+        self.titleLabel = ctk.CTkLabel(
+            self,
+            text = mealData.strMealShort,
+            font = fontBig,
+            wraplength = 300
+        )
+
+        self.titleLabel.pack()
+
+        # Bind click to open recipe popup
+        self.bind('<Button-1>', lambda event : self.openFullRecipe())
+        self.imgLabel.bind('<Button-1>', lambda event : self.openFullRecipe())
+
+        # Hovering is a strong hint of a click, fetch the details early
+        self.bind('<Enter>', lambda event : self.prefetchDetails())
+
+    # Rebinds a recycled card to another meal
+    def setMeal(self, mealData) :
+        self.mealData = mealData
+        self.imgLabel.configure(image = self.placeHolder)
+        self.idLabel.configure(text = f'Meal ID: {mealData.idMeal}')
+        self.titleLabel.configure(text = mealData.strMealShort)
+
+    # Queues the image download on the shared scheduler, lower priority loads first
+    # Keyed by card so a rebound card drops the load for its previous meal
+    def requestImage(self, priority = 0) :
+        mealThumbUrl = self.mealData.previewThumb
+
+        if mealThumbUrl :
+            self.api.scheduler.submit(
+                lambda : self.loadImageAsync(mealThumbUrl),
+                lambda imgPIL : self.showImage(imgPIL, mealThumbUrl),
+                priority,
+                key = self
+            )
+
+    def prefetchDetails(self) :
+        self.api.prefetchDetails(self.mealData.idMeal)
+
+    def openFullRecipe(self) :
+        with instruments.span('ui.openFullRecipe') : self.openRecipe()
+
+    def openRecipe(self) :
+        clicked = time.perf_counter()
+
+        # Opens straight away, with full details when prefetched or a loading state otherwise
+        full = self.api.details.get(self.mealData.idMeal)
+        popup = RecipeUI.shared(self.api, self.updates)
+        popup.open(full or self.mealData, loading = full is None)
+
+        if full is None :
+            popup.loadDetails(self.mealData.idMeal, clicked)
+        else :
+            blocked = time.perf_counter() - clicked
+            self.api.details.recordOpen(True, blocked, blocked)
+
+    # Loads the image in the background, runs on a scheduler worker
+    def loadImageAsync(self, url) :
+        try :
+            return self.api.loadImage(url, imageSmall)
+        except UpstreamUnavailable :
+            pass # TheMealDB is failing, the placeholder stays
+        except Exception as exception :
+            print('Failed to load image:', url, exception)
+
+    # Replaces placeholder image with the actual image once it has loaded
+    def showImage(self, imgPIL, url) :
+        if imgPIL is None : return
+        self.updates.post(self, 'image', lambda : self.setImage(imgPIL, url))
+
+    def setImage(self, imgPIL, url) :
+        # Card may have been cleared or rebound while the image was loading
+        if not self.winfo_exists() or self.mealData.previewThumb != url : return
+        self.imgLabel.configure(image = ctk.CTkImage(imgPIL, size = imageSmall))
+
+# -------------------------------- CARD GRID UI -------------------------------- #
+
+class MainUI(ctk.CTkScrollableFrame) :
+    def __init__(self, parent, maxColumns = 4, indexOffset = 0, virtualThreshold = 100, overscan = 1, pageSize = 24) :
+        super().__init__(parent, fg_color = "transparent")
+
+        self.maxColumns = maxColumns
+        self.indexOffset = indexOffset
+        self.cards = []
+
+        # Virtualized mode : results at or above the threshold share a fixed pool of cards
+        # that get rebound to different meals as the user scrolls
+        self.virtual = False
+        self.virtualThreshold = virtualThreshold
+        self.overscan = overscan # Extra rows kept bound above and below the viewport
+        self.prefetchRows = 2 # Grid rows whose recipe details are prefetched when added
+        self.records = []
+        self.cardFactory = None
+        self.pool = [] # Every pooled card ever created
+        self.free = [] # Pooled cards not bound to a record
+        self.bound = {} # Record index → pooled card
+        self.boundRange = range(0)
+        self.rowHeight = 400 + smallPadding * 2
+        self.header = 0 # Height above the first row, taken by the label
+
+        # Paged mode : smaller result sets are added a page at a time as the user nears the bottom
+        self.pageSize = pageSize
+        self.pageRows = 2 # The next page is asked for this many rows before the bottom
+        self.pageRecords = []
+        self.shown = 0 # Records handed to loadPage so far
+        self.loadPage = None
+
+        # Holds the frame open for the bound rows only, never for every record
+        # Windows taller than about 32767 px cannot be mapped under X11
+        self.spacer = ctk.CTkFrame(self, fg_color = "transparent", width = 1, height = 1)
+
+        # Loading/Recipe label
+        self.loadLabel = ctk.CTkLabel(
+            self,
+            text = 'Start Searching a Recipe',
+            font = fontBig
+        )
+        
+        self.loadLabel.grid(row = 0, column = 0, columnspan = maxColumns, padx = smallPadding, pady = smallPadding)
+
+        # Configure responsive columns
+        for col in range(maxColumns) :
+            self.grid_columnconfigure(col, weight = 1)
+
+        # Rebind pooled cards whenever the view scrolls or resizes
+        self._parent_canvas.configure(yscrollcommand = self.onScroll)
+        self._parent_canvas.bind('<Configure>', lambda event : self.updateWindow(force = True), add = '+')
+
+        # Replaces the scroll region binding of CTkScrollableFrame, which follows the frame size
+        self.bind('<Configure>', lambda event : self.fitScrollRegion())
+
+    # Clears all cards, pooled cards are hidden and kept for the next search
+    def clear(self) :
+        for card in self.cards : card.destroy()
+        self.cards.clear()
+
+        for card in self.bound.values() :
+            card.place_forget()
+            self.free.append(card)
+
+        self.bound.clear()
+        self.boundRange = range(0)
+        self.records = []
+        self.virtual = False
+        self.spacer.grid_remove()
+        self._parent_canvas.coords(self._create_window_id, 0, 0)
+        self.fitScrollRegion()
+
+        self.pageRecords = []
+        self.shown = 0
+        self.loadPage = None
+
+    # Adds a CardUI widget and places it in the grid
+    def addCard(self, card) :
+        index = len(self.cards) + self.indexOffset
+        row = (index // self.maxColumns) + 1 # +1 because row 0 is the label
+        col = index % self.maxColumns
+
+        card.grid(row = row, column = col, padx = smallPadding, pady = smallPadding)
+        self.cards.append(card)
+
+        # Top rows are on screen when results first appear, so they load first
+        card.requestImage(priority = row)
+
+        # Cards on the first screen are the likeliest clicks
+        if row <= self.prefetchRows : card.prefetchDetails()
+
+    # ---------------- Paged mode ---------------- #
+
+    # Shows records a page at a time, loadPage(records) gets each page added through addCard
+    # Images and details are only requested for cards on loaded pages
+    def setPages(self, records, loadPage) :
+        self.clear()
+        self.pageRecords = records
+        self.loadPage = loadPage
+        self.nextPage()
+
+    def nextPage(self) :
+        # Waits until the previous page is fully added, stops once every record is shown
+        if self.shown >= len(self.pageRecords) or len(self.cards) < self.shown : return
+
+        page = self.pageRecords[self.shown : self.shown + self.pageSize]
+        self.shown += len(page)
+        self.loadPage(page)
+
+    def nearBottom(self, last) :
+        remaining = (1 - float(last)) * self.winfo_height()
+        return remaining < self._apply_widget_scaling(self.rowHeight * self.pageRows)
+
+    # ---------------- Virtualized mode ---------------- #
+
+    # Shows every record through a pool of cards, cardFactory(parent, meal) builds new pool cards
+    # The canvas scroll region covers every row, while the frame only spans the bound rows
+    # and is moved down the canvas with them, so no real window grows with the result count
+    def setRecords(self, records, cardFactory) :
+        self.clear()
+        self.virtual = True
+        self.records = records
+        self.cardFactory = cardFactory
+
+        self.spacer.grid(row = 1, column = 0, columnspan = self.maxColumns, sticky = 'nw')
+        self.update_idletasks()
+        self.header = self._reverse_widget_scaling(self.spacer.winfo_y())
+
+        self.fitScrollRegion()
+        self._parent_canvas.yview_moveto(0)
+        self.updateWindow()
+
+    # Scroll region of the whole grid, in virtual mode that is every row rather than the frame
+    def fitScrollRegion(self) :
+        canvas = self._parent_canvas
+
+        if not self.virtual :
+            canvas.configure(scrollregion = canvas.bbox('all'))
+            return
+
+        rows = -(-len(self.records) // self.maxColumns)
+        height = self._apply_widget_scaling(self.header + rows * self.rowHeight)
+        canvas.configure(scrollregion = (0, 0, canvas.winfo_width(), height))
+
+    # Also called when the scroll region grows, so a page that does not fill the view pulls in the next one
+    def onScroll(self, first, last) :
+        self._scrollbar.set(first, last)
+
+        if self.virtual : self.updateWindow()
+        elif self.loadPage and self.nearBottom(last) : self.nextPage()
+
+    # First and last row the viewport covers, before overscan and clamping to the records
+    def visibleRows(self) :
+        canvas = self._parent_canvas
+        top = self._reverse_widget_scaling(canvas.canvasy(0)) - self.header
+        height = self._reverse_widget_scaling(canvas.winfo_height())
+
+        return int(top // self.rowHeight), int((top + height) // self.rowHeight)
+
+    # Rebinds pooled cards so exactly the rows in view (plus overscan) are shown
+    # force also moves cards that stayed bound, used when the width changes
+    def updateWindow(self, force = False) :
+        if not self.virtual or not self.records : return
+
+        shownFirst, shownLast = self.visibleRows()
+        rows = -(-len(self.records) // self.maxColumns)
+        first = max(0, shownFirst - self.overscan)
+        last = min(rows - 1, shownLast + self.overscan)
+
+        wanted = range(first * self.maxColumns, min((last + 1) * self.maxColumns, len(self.records)))
+        if wanted == self.boundRange and not force : return
+
+        # Cards are placed relative to the frame, so they all move when the frame does
+        if wanted.start != self.boundRange.start : force = True
+
+        # Release cards that scrolled out of the window
+        for index in [index for index in self.bound if index not in wanted] :
+            card = self.bound.pop(index)
+            card.place_forget()
+            self.free.append(card)
+
+        # The frame starts a header above the first bound row and is only tall enough for the bound rows
+        # Its label is then scrolled out of view, above the top of the viewport
+        self._parent_canvas.coords(self._create_window_id, 0, self._apply_widget_scaling(first * self.rowHeight))
+        self.spacer.configure(height = (last - first + 1) * self.rowHeight)
+
+        columnWidth = self._reverse_widget_scaling(self.winfo_width()) / self.maxColumns
+
+        for index in wanted :
+            row, col = divmod(index, self.maxColumns)
+            card = self.bound.get(index)
+
+            if card is None :
+                meal = self.records[index]
+
+                if self.free :
+                    card = self.free.pop()
+                    card.setMeal(meal)
+                else :
+                    card = self.cardFactory(self, meal)
+                    self.pool.append(card)
+
+                self.bound[index] = card
+
+                # Image loads follow what is visible, nearest rows first
+                card.requestImage(priority = row - first)
+
+                # Details for cards actually in view, not the overscan
+                if shownFirst <= row <= shownLast : card.prefetchDetails()
+            elif not force :
+                continue
+
+            card.place(x = col * columnWidth + (columnWidth - 300) / 2, y = self.header + (row - first) * self.rowHeight + smallPadding)
+
+        self.boundRange = wanted
+
+# -------------------------------- RECIPE UI -------------------------------- #
+
+class RecipeUI(ctk.CTkToplevel) :
+    # The one popup, built on first use then hidden and rebound instead of destroyed
+    instance = None
+    # Gray placeholder shown while a recipe image loads, shared by every opening
+    placeholder = None
+
+    @classmethod
+    def shared(cls, api : MealAPI, updates : UpdateQueue) :
+        if cls.instance is None or not cls.instance.winfo_exists() : cls.instance = cls(api, updates)
+        return cls.instance
+
+    def __init__(self, api : MealAPI, updates : UpdateQueue) :
+        super().__init__(fg_color = backGroundCol)
+
+        self.api = api
+        self.updates = updates
+        self.meal = None
+        # Bumped on every open and close, async results for an older opening are dropped
+        self.token = 0
+
+        self.geometry('1100x800')
+        self.withdraw() # Shown by open()
+        self.protocol('WM_DELETE_WINDOW', self.close)
+
+        if RecipeUI.placeholder is None : RecipeUI.placeholder = ctk.CTkImage(Image.new('RGB', imageBig, 'gray'), size = imageBig)
+
+        # Configure layout (two-column layout)
+        self.grid_rowconfigure(0, weight = 1)
+        self.grid_columnconfigure(0, weight = 1)
+        self.grid_columnconfigure(1, weight = 1)
+
+        # ---------------- MAIN FRAME (Left) ---------------- #
+
+        mainFrame = ctk.CTkScrollableFrame(self, fg_color = foreGroundCol)
+        mainFrame.grid(row = 0, column = 0, sticky = 'nsew', padx = bigPadding, pady = bigPadding)
+        mainFrame.grid_columnconfigure(0, weight = 1)
+        self.mainFrame = mainFrame
+
+        # ID
+        self.idLabel = ctk.CTkLabel(
+            mainFrame,
+            text = '',
+            font = fontMedium,
+            wraplength = 400
+        )
+
+        self.idLabel.grid(row = 0, column = 0, pady = smallPadding)
+
+        # Meal Name
+        self.nameLabel = ctk.CTkLabel(
+            mainFrame,
+            text = '',
+            font = fontBig,
+            wraplength = 400
+        )
+
+        self.nameLabel.grid(row = 1, column = 0, pady = smallPadding)
+
+        # Image placeholder
+        self.imgLabel = ctk.CTkLabel(mainFrame, image = RecipeUI.placeholder, text = '')
+        self.imgLabel.grid(row = 2, column = 0, pady = smallPadding)
+
+        # Ingredients title, doubles as the loading indicator
+        self.ingredientsLabel = ctk.CTkLabel(
+            mainFrame,
+            text = 'Loading recipe…',
+            font = fontMedium
+        )
+
+        self.ingredientsLabel.grid(row = 3, column = 0, pady = smallPadding)
+
+        # Ingredient labels, reconfigured for each meal and only added when a meal has more than ever before
+        self.ingredientLabels = []
+
+        # ---------------- INSTRUCTIONS FRAME (Right) ---------------- #
+
+        instructionFrame = ctk.CTkScrollableFrame(self, fg_color = foreGroundCol)
+        instructionFrame.grid(row = 0, column = 1, sticky = 'nswe', padx = bigPadding, pady = bigPadding)
+        self.instructionFrame = instructionFrame
+
+        ctk.CTkLabel(
+            instructionFrame,
+            text = 'Instructions',
+            font = fontMedium
+        ).grid(row = 0, column = 0, pady = smallPadding)
+
+        self.instructions_label = ctk.CTkLabel(
+            instructionFrame,
+            text = 'Loading instructions…',
+            font = fontSmall,
+            wraplength = 500,
+            justify = 'left'
+        )
+
+        self.instructions_label.grid(row = 1, column = 0, pady = smallPadding, sticky = 'nw')
+
+        # YouTube Button, displayed when the meal has a link
+        self.youtubeButton = ctk.CTkButton(
+            self,
+            text = 'Watch YouTube Tutorial',
+            font = fontMedium,
+            fg_color = accentCol,
+            hover_color = accentCol,
+            command = lambda : webbrowser.open(self.meal.strYoutube)
+        )
+
+        # Close Button
+        ctk.CTkButton(
+            self,
+            text = 'Close Popup Window',
+            font = fontMedium,
+            fg_color = accentCol,
+            hover_color = accentCol,
+            command = self.close
+        ).grid(row = 1, column = 1, padx = bigPadding, pady = bigPadding)
+
+    # Rebinds the popup to a meal and shows it
+    # loading : meal only has card fields, details are filled in by loadDetails
+    def open(self, meal, loading = False) :
+        self.token += 1
+        self.meal = meal
+
+        self.title(meal.strMeal)
+        self.idLabel.configure(text = f'Meal ID: {meal.idMeal}')
+        self.nameLabel.configure(text = meal.strMeal)
+        self.imgLabel.configure(image = RecipeUI.placeholder)
+
+        # Back to the top for the new recipe
+        self.mainFrame._parent_canvas.yview_moveto(0)
+        self.instructionFrame._parent_canvas.yview_moveto(0)
+
+        # Load image asynchronously, ahead of any card thumbnails and kept across searches
+        # Keyed to the popup so a queued image for the previous opening is dropped
+        if meal.strMealThumb :
+            token = self.token
+
+            self.api.scheduler.submit(
+                lambda : self.loadImageAsync(meal.strMealThumb),
+                lambda imgPIL : self.showImage(imgPIL, token),
+                priority = -1,
+                cancellable = False,
+                key = self
+            )
+
+        if loading :
+            self.ingredientsLabel.configure(text = 'Loading recipe…')
+            self.ingredientsLabel.grid()
+            self.instructions_label.configure(text = 'Loading instructions…')
+            self.youtubeButton.grid_remove()
+            for label in self.ingredientLabels : label.grid_remove()
+        else :
+            self.showDetails(meal)
+
+        self.deiconify()
+        self.lift()
+
+        # Focuses all the input into this window
+        self.grab_set()
+
+    # Hides the popup, it is rebound on the next open
+    def close(self) :
+        self.token += 1
+        self.grab_release()
+        self.withdraw()
+
+    # Fills in ingredients, instructions and the YouTube button
+    def showDetails(self, meal) :
+        # Ingredients (Looped)
+        ingredients = meal.ingredients
+
+        if ingredients :
+            self.ingredientsLabel.configure(text = 'Ingredients')
+            self.ingredientsLabel.grid()
+        else :
+            self.ingredientsLabel.grid_remove()
+
+        # Grow the pool only past its largest meal so far
+        while len(self.ingredientLabels) < len(ingredients) :
+            label = ctk.CTkLabel(
+                self.mainFrame,
+                text = '',
+                font = fontSmall,
+                anchor = 'w',
+                justify = 'left'
+            )
+
+            label.grid(row = 4 + len(self.ingredientLabels), column = 0, sticky = 'w', padx = smallPadding)
+            self.ingredientLabels.append(label)
+
+        for index, label in enumerate(self.ingredientLabels) :
+            if index < len(ingredients) :
+                label.configure(text = ingredients[index])
+                label.grid()
+            else :
+                label.grid_remove()
+
+        self.instructions_label.configure(text = meal.strInstructions or 'No instructions available.')
+
+        if meal.strYoutube : self.youtubeButton.grid(row = 1, column = 0, padx = bigPadding, pady = bigPadding)
+        else : self.youtubeButton.grid_remove()
+
+    # ---------------- Async loaders ---------------- #
+
+    # Loads full details off the main thread, clicked is the perf_counter time of the click
+    def loadDetails(self, mealId, clicked) :
+        blocked = time.perf_counter() - clicked
+        token = self.token
+
+        def work() :
+            meal = self.api.details.load(mealId)
+            self.updates.post(self, 'details', lambda : self.applyDetails(meal, clicked, blocked, token))
+
+        threading.Thread(target = work, daemon = True).start()
+
+    def applyDetails(self, meal, clicked, blocked, token) :
+        # Popup may have been closed or reopened on another recipe while the details were loading
+        if not self.winfo_exists() or token != self.token : return
+
+        if meal is None :
+            self.ingredientsLabel.configure(text = 'Recipe unavailable')
+            self.instructions_label.configure(text = 'No instructions available.')
+            return
+
+        self.meal = meal
+        self.showDetails(meal)
+        self.api.details.recordOpen(False, blocked, time.perf_counter() - clicked)
+
+    def loadImageAsync(self, url) :
+        try :
+            return self.api.loadImage(url, imageBig)
+        except UpstreamUnavailable :
+            pass # TheMealDB is failing, the placeholder stays
+        except Exception as exception :
+            print('Failed to load recipe image :', exception)
+
+    def showImage(self, imgPIL, token) :
+        if imgPIL is None : return
+        self.updates.post(self, 'image', lambda : self.setImage(imgPIL, token))
+
+    def setImage(self, imgPIL, token) :
+        # Popup may have been closed or reopened on another recipe while the image was loading
+        if not self.winfo_exists() or token != self.token : return
+        self.imgLabel.configure(image = ctk.CTkImage(imgPIL, size = imageBig), text = '')
+
+# -------------------------------- HEADER UI -------------------------------- #
+
+class HeaderUI(ctk.CTkFrame) :
+    def __init__(self, parent, getSuggestions, runSearch, updates : UpdateQueue, debounceMs = 150, localSuggestions = None) :
+        super().__init__(parent, fg_color = "transparent")
+
+        self.updates = updates
+        self.fullSuggestions = []
+        self.runSearch = runSearch
+        self.getSuggestions = getSuggestions
+
+        # Debounced, one request per mode, reuses complete results for longer prefixes
+        # Local index hits skip the debounce altogether
+        self.pipeline = SuggestionPipeline(self, getSuggestions, self.fetchSuggestions, debounceMs, local = localSuggestions)
+
+        self.grid_columnconfigure(0, weight = 1)
+
+        # Track last typed text to avoid race conditions
+        self.lastQuery = ""
+
+        # ---------------- TITLE ---------------- #
+
+        ctk.CTkLabel(
+            self,
+            text = applicationName,
+            font = fontBig
+        ).grid(row = 0, column = 0, padx = bigPadding, pady = bigPadding, sticky = 'nsw')
+
+        # Mode menu
+        self.modeMenu = ctk.CTkOptionMenu(
+            self,
+            values = ['Name', 'Category', 'Ingredient', 'Area', 'ID', 'Multi'],
+            font = fontMedium,
+            dropdown_font = fontMedium,
+            fg_color = accentCol,
+            button_color = accentCol,
+            button_hover_color = accentCol
+        )
+
+        self.modeMenu.grid(row = 0, column = 2, padx = bigPadding, pady = bigPadding, sticky = 'nse')
+        self.modeMenu.configure(command = lambda e : self.modeChanged())
+
+        # Search button
+        self.searchButton = ctk.CTkButton(
+            self,
+            text = '🔍',
+            font = fontBig,
+            fg_color = accentCol,
+            hover_color = accentCol
+        )
+
+        self.searchButton.grid(row = 0, column = 3, padx = bigPadding, pady = bigPadding, sticky = 'nse')
+
+        # Search bar
+        self.searchBar = ctk.CTkEntry(
+            self,
+            placeholder_text = 'Search...',
+            font = fontMedium,
+            fg_color = foreGroundCol
+        )
+
+        self.searchBar.grid(row = 0, column = 4, ipadx = bigPadding * 8, padx = bigPadding, pady = bigPadding, sticky = 'nswe')
+
+        # Bind typing event
+        self.searchBar.bind('<KeyRelease>', lambda e : self.refreshAutocomplete())
+
+        # ---------------- AUTOCOMPLETE FRAME ---------------- #
+
+        self.autoFrame = ctk.CTkFrame(self, fg_color = foreGroundCol)
+        self.autoFrame.grid(row = 1, column = 0, columnspan = 5, sticky = 'nwe', padx = bigPadding)
+        self.autoFrame.grid_columnconfigure((0, 1, 2, 3), weight = 1)
+        self.autoFrame.grid_remove() # Hidden at startup
+
+        # Suggested label
+        self.suggestLabel = ctk.CTkLabel(
+            self.autoFrame,
+            text = 'Suggested',
+            font = fontBig
+        )
+
+        self.suggestLabel.grid(row = 0, column = 0, columnspan = 4, pady = (smallPadding, 0))
+
+        # Display 4 suggestion buttons, store them for later
+        self.autoButtons = []
+
+        for index in range(4) :
+            btn = ctk.CTkButton(
+                self.autoFrame,
+                text = '',
+                font = fontMedium,
+                fg_color = accentCol,
+                hover_color = accentCol,
+                command = lambda i = index : self.selectSuggestion(i)
+            )
+
+            btn.grid(row = 1, column = index, padx = bigPadding, pady = bigPadding, sticky = 'we')
+            self.autoButtons.append(btn)
+
+    def modeGet(self) :
+        return self.modeMenu.get().lower()
+
+    def searchGet(self) :
+        return self.searchBar.get().lower().strip()
+
+    # Multi mode suggests for the term after the last '+'
+    def suggestionTerm(self) :
+        text = self.searchGet()
+        return text.rsplit('+', 1)[-1].strip() if self.modeGet() == 'multi' else text
+
+    def modeChanged(self) :
+        placeholder = 'seafood + italian + garlic' if self.modeGet() == 'multi' else 'Search...'
+        self.searchBar.configure(placeholder_text = placeholder)
+        self.refreshAutocomplete()
+
+    # ---------------- AUTOCOMPLETE LOGIC ---------------- #
+    
+    def refreshAutocomplete(self):
+        mode = self.modeGet()
+        text = self.suggestionTerm()
+
+        # Update last query
+        self.lastQuery = text
+
+        # Hide and exit early if the text is less than 2 characters
+        if len(self.lastQuery) < 2 :
+            self.pipeline.cancel()
+            self.autoFrame.grid_remove()
+            return
+
+        self.pipeline.keystroke(text, mode)
+
+    # Called by the pipeline once suggestions for a text are ready
+    def fetchSuggestions(self, text, mode, suggestions) :
+        # Ignore outdated results
+        if text != self.lastQuery : return
+
+        # Push UI update to main thread, checking again in case typing continued
+        self.updates.post(self, 'suggestions', lambda : self.showSuggestions(suggestions) if text == self.lastQuery and mode == self.modeGet() else None)
+
+    def showSuggestions(self, suggestions) :
+        self.fullSuggestions = suggestions
+
+        # Ignore empty suggestions
+        if not suggestions :
+            self.autoFrame.grid_remove()
+            return
+
+        self.autoFrame.grid()
+
+        for index, btn in enumerate(self.autoButtons) :
+            if index < len(suggestions) :
+                options = suggestions[index]
+                # CASE 2 : Category / Ingredient / Area → item is a string
+                buttonText = options
+                # CASE 1 : Name mode → item is a meal object
+                if isinstance(options, Meal) : buttonText = options.strMealShort
+
+                btn.configure(text = buttonText)
+                btn.grid()
+            else :
+                btn.grid_remove()
+
+    def selectSuggestion(self, index) :
+        options = self.fullSuggestions[index]
+
+        # CASE 2 : Category / Ingredient / Area → item is a string
+        buttonText = options
+        # CASE 1 : Name mode → item is a meal object
+        if isinstance(options, Meal) : buttonText = options.strMeal
+
+        # CASE 3 : Multi mode → completes the last term, the search runs once every filter is in
+        if self.modeGet() == 'multi' :
+            terms = [term.strip() for term in self.searchBar.get().split('+')][:-1]
+            buttonText = ' + '.join(terms + [buttonText])
+
+        self.searchBar.delete(0, 'end')
+        self.searchBar.insert(0, buttonText)
+        self.autoFrame.grid_remove()
+
+        if self.modeGet() != 'multi' : self.runSearch(buttonText, self.modeGet())
+
+# -------------------------------- MAIN APPLICATION -------------------------------- #
+
+class Application(ctk.CTk) :
+    def __init__(self) :
+        super().__init__(fg_color = backGroundCol)
+
+        self.geometry('360x360')
+        self.after(0, self.wm_state, 'zoomed')
+        self.title(f'{applicationName} v{applicationVersion}')
+
+        # Grid config to adapt to layout
+        self.grid_rowconfigure(0, weight = 0)
+        self.grid_rowconfigure(1, weight = 1)
+        self.grid_columnconfigure(0, weight = 1)
+
+        self.api = MealAPI()
+
+        # Worker threads hand widget updates to this queue, applied in batches once per frame
+        self.updates = UpdateQueue(self)
+        self.updates.start()
+
+        # Option lists and their indexes load in the background, the first dropdown use never waits on them
+        threading.Thread(target = self.api.preloadOptions, daemon = True).start()
+
+        # Header Widget
+        header = HeaderUI(self, self.getAutocomplete, self.runSearch, self.updates, localSuggestions = self.localAutocomplete)
+        header.grid(row = 0, column = 0, sticky = 'nwe')
+
+        header.searchButton.configure(command = lambda : self.runSearch(header.searchGet(), header.modeGet()))
+        header.searchBar.bind('<Return>', lambda event : self.runSearch(header.searchGet(), header.modeGet()))
+
+        # Main Widget
+        self.main = MainUI(self, 4, 0)
+        self.main.grid(row = 1, column = 0, sticky = 'nsew')
+
+        # Temp image for all the cards as they load, shared across searches
+        self.tempImg = ctk.CTkImage(Image.new('RGB', imageSmall, 'gray'), size = imageSmall)
+
+        # Inserts cards on the main thread a few at a time within a per-frame budget
+        self.renderer = RenderScheduler(self)
+
+        # Diagnostics with MEALY_TRACE=1 : F11 writes a JSON snapshot, F12 toggles the timing overlay
+        self.overlay = None
+        instruments.watch('renderer', self.renderer.info)
+        instruments.watch('updates', self.updates.info)
+
+        if instruments.enabled :
+            self.bind('<F11>', lambda event : print('Trace written to', instruments.dump()))
+            self.bind('<F12>', lambda event : self.toggleOverlay())
+
+    # ---------------- DIAGNOSTICS ---------------- #
+
+    def toggleOverlay(self) :
+        if self.overlay :
+            self.overlay.destroy()
+            self.overlay = None
+            return
+
+        self.overlay = ctk.CTkLabel(self, text = '', font = ('JetBrains Mono', 12), fg_color = foreGroundCol, justify = 'left', anchor = 'nw')
+        self.overlay.place(relx = 1, x = -smallPadding, y = smallPadding, anchor = 'ne')
+        self.refreshOverlay()
+
+    # Span timings and counters, refreshed twice a second while shown
+    def refreshOverlay(self) :
+        if not (self.overlay and self.overlay.winfo_exists()) : return
+
+        snapshot = instruments.snapshot()
+        lines = [f'{"span":<20}{"n":>6}{"p50":>9}{"p95":>9}']
+
+        for name, info in snapshot['spans'].items() :
+            lines.append(f'{name:<20}{info['count']:>6}{info['p50_ms']:>9.1f}{info['p95_ms']:>9.1f}')
+
+        for name, value in snapshot['counters'].items() :
+            lines.append(f'{name:<20}{value:>6}')
+
+        lines.append(f'{"threads":<20}{snapshot['threads']['active']:>6}')
+
+        # UI queue depth and the time the last frame spent applying updates
+        updates = self.updates.info()
+        lines.append(f'{"ui.queue":<20}{updates['depth']:>6}{updates['lastApplyMs']:>9.1f}{updates['maxApplyMs']:>9.1f}')
+
+        self.overlay.configure(text = '\n'.join(lines))
+        self.after(500, self.refreshOverlay)
+
+    # ---------------- SEARCH LOGIC ---------------- #
+
+    def runSearch(self, prompt, mode) :
+        # Drop image downloads still queued or running for the previous search
+        self.api.scheduler.newGeneration()
+        # Clear grid
+        self.main.clear()
+        # Change to loading while waiting
+        self.main.loadLabel.configure(text = f'Loading "{prompt}" by {mode}…')
+
+        # New render stream, cards still waiting from the previous search are dropped
+        generation = self.renderer.start(lambda meal : self.main.addCard(self.makeCard(self.main, meal)))
+
+        threading.Thread(
+            target = lambda : self.searchThread(prompt, mode, generation),
+            daemon = True
+        ).start()
+
+    # Runs function on the main thread unless a newer search has started
+    # slot keeps one waiting update per kind, a newer search replaces the older one
+    def afterSearch(self, generation, slot, function) :
+        self.updates.post(self, slot, lambda : function() if generation == self.renderer.generation else None)
+
+    def searchThread(self, prompt, mode, generation) :
+        # Process Raw API prompt, multi mode intersects one filter per term
+        meals = self.api.searchRecords(mode, prompt)
+
+        # Update loading label if none found
+        if not meals :
+            self.renderer.finish(generation)
+            message = "No results found" if self.api.available() else "TheMealDB is not responding, try again shortly"
+            self.afterSearch(generation, 'label', lambda : self.main.loadLabel.configure(text = message))
+            return
+
+        # Update loading label if results found
+        self.afterSearch(generation, 'label', lambda : self.main.loadLabel.configure(text = f'Recipes for "{prompt}" by {mode}'))
+
+        # Large result sets recycle a fixed pool of cards instead of one per meal
+        if len(meals) >= self.main.virtualThreshold :
+            self.renderer.finish(generation)
+            self.afterSearch(generation, 'results', lambda : self.main.setRecords(meals, self.makeCard))
+            return
+
+        # Cards are added by the renderer on the main thread, one page now and the next as the user nears the bottom
+        self.renderer.finish(generation)
+        self.afterSearch(generation, 'results', lambda : self.main.setPages(meals, lambda page : self.renderer.extend(generation, page)))
+
+    def makeCard(self, parent, meal) :
+        with instruments.span('ui.makeCard') :
+            return CardUI(parent, meal, self.tempImg, self.api, self.updates)
+
+    # Top 4 results by default, limit None returns all of them
+    def getAutocomplete(self, text, mode, limit = 4) :
+        if mode in ['category', 'ingredient', 'area'] :
+            # Local index over the API's list feature
+            return self.api.suggestOptions(mode, text, limit)
+
+        if mode == 'multi' :
+            # Every list at once for the term being typed
+            return self.api.suggestFilters(text, limit)
+
+        if mode == 'name' :
+            # Local fuzzy index first, the API only when it has nothing close
+            meals = self.api.suggestNames(text, limit)
+            if meals : return meals
+
+            raw = self.api.searchMeals('name', text)
+            meals = self.api.processMeals(raw)
+            return meals[:limit]
+
+        return []
+
+    # Instant suggestions without a request, called on every keystroke
+    def localAutocomplete(self, text, mode) :
+        if mode == 'name' : return self.api.suggestNames(text)
+        return []